@@ -0,0 +1,97 @@
+"""
+Measures read throughput of the realtime models with many reader threads \
+and a single writer, in the locking mode and the copy-on-write mode.
+Run using: python -m benchmarks.bench_copy_on_write [readers] [seconds]
+"""
+import sys
+import threading
+import time
+from tse_utils.models.realtime import DeepOrderBook
+from tse_utils.models.trader import Portfolio, PortfolioSecurity
+
+DEPTH = 50
+SECURITIES = 50
+WRITE_INTERVAL = 0.001
+
+
+def deep_order_book_workload(copy_on_write: bool):
+    """Returns the reader and writer of a deep order book"""
+    book = DeepOrderBook(copy_on_write=copy_on_write)
+    for x in range(DEPTH):
+        book.update_buy_row(1, 100, 10000 - x)
+    counter = [0]
+
+    def read():
+        return book.get_buy_rows(count=5)
+
+    def write():
+        counter[0] += 1
+        book.update_buy_row(1, counter[0], 10000 - counter[0] % DEPTH)
+
+    return read, write
+
+
+def portfolio_workload(copy_on_write: bool):
+    """Returns the reader and writer of a portfolio"""
+    portfolio = Portfolio(copy_on_write=copy_on_write)
+    for x in range(SECURITIES):
+        portfolio.update_asset(PortfolioSecurity(isin=f"IRO1TEST{x:04}", quantity=x))
+    counter = [0]
+
+    def read():
+        return portfolio.get_all_assets()
+
+    def write():
+        counter[0] += 1
+        portfolio.update_asset(PortfolioSecurity(
+            isin=f"IRO1TEST{counter[0] % SECURITIES:04}", quantity=counter[0]))
+
+    return read, write
+
+
+def measure(workload, copy_on_write: bool, readers: int, seconds: float):
+    """Runs the readers and a pacing writer for a while and counts their calls"""
+    read, write = workload(copy_on_write)
+    stop = threading.Event()
+    counts = [0] * (readers + 1)
+
+    def reader(index: int) -> None:
+        while not stop.is_set():
+            read()
+            counts[index] += 1
+
+    def writer() -> None:
+        while not stop.is_set():
+            write()
+            counts[-1] += 1
+            time.sleep(WRITE_INTERVAL)
+
+    threads = [threading.Thread(target=reader, args=(x,)) for x in range(readers)]
+    threads.append(threading.Thread(target=writer))
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return sum(counts[:-1]) / seconds, counts[-1] / seconds
+
+
+def main():
+    """Prints reads and writes per second of both modes for each model"""
+    readers = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 2.0
+    print(f"{readers} readers, 1 writer, {seconds}s per run")
+    for title, workload in (
+            ("DeepOrderBook.get_buy_rows(5)", deep_order_book_workload),
+            ("Portfolio.get_all_assets()", portfolio_workload)
+    ):
+        print(title)
+        for copy_on_write in (False, True):
+            reads, writes = measure(workload, copy_on_write, readers, seconds)
+            mode = "copy-on-write" if copy_on_write else "locking"
+            print(f"  {mode:<16}{reads:>14,.0f} reads/s{writes:>12,.0f} writes/s")
+
+
+if __name__ == "__main__":
+    main()
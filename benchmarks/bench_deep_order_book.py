@@ -0,0 +1,106 @@
+"""
+Compares the price-indexed DeepOrderBook with a replica of its previous \
+list-based layout on a stream of OMS-like updates and reads.
+Run using: python -m benchmarks.bench_deep_order_book [depth ...]
+"""
+import random
+import sys
+import threading
+import timeit
+from tse_utils.models.realtime import DeepOrderBook, OrderBookRowSide
+
+OPERATIONS = 20_000
+
+
+class ListDeepOrderBook:
+    """Replica of the previous list-based DeepOrderBook"""
+
+    def __init__(self):
+        self._buy_rows: list[OrderBookRowSide] = []
+        self._buy_rows_lock: threading.Lock = threading.Lock()
+        self._sell_rows: list[OrderBookRowSide] = []
+        self._sell_rows_lock: threading.Lock = threading.Lock()
+
+    def update_buy_row(self, num: int, volume: int, price: int) -> None:
+        """Updates a single buy row if exists and adds it if not"""
+        with self._buy_rows_lock:
+            row = next((x for x in self._buy_rows if x.price == price), None)
+            if row:
+                row.volume = volume
+                row.num = num
+            else:
+                self._buy_rows.append(OrderBookRowSide(
+                    num=num, volume=volume, price=price))
+
+    def remove_buy_row(self, price: int) -> None:
+        """Removes a single buy row"""
+        with self._buy_rows_lock:
+            row = next((x for x in self._buy_rows if x.price == price), None)
+            if row:
+                self._buy_rows.remove(row)
+
+    def get_buy_rows(self) -> list[OrderBookRowSide]:
+        """Returns a copy of all buy rows"""
+        with self._buy_rows_lock:
+            return sorted(self._buy_rows.copy(), key=lambda x: x.price, reverse=True)
+
+
+def operations(depth: int, seed: int = 0) -> list[tuple]:
+    """Builds a mix of 80% updates, 10% removals and 10% best row reads"""
+    rand = random.Random(seed)
+    prices = [10000 - 10 * x for x in range(depth * 2)]
+    result = []
+    for _ in range(OPERATIONS):
+        dice = rand.random()
+        price = rand.choice(prices)
+        if dice < 0.8:
+            result.append(("update", rand.randint(1, 50), rand.randint(1, 10**6), price))
+        elif dice < 0.9:
+            result.append(("remove", price))
+        else:
+            result.append(("best",))
+    return result
+
+
+def run_list(ops: list[tuple]) -> None:
+    """Replays the operations on the list-based replica"""
+    book = ListDeepOrderBook()
+    for operation in ops:
+        if operation[0] == "update":
+            book.update_buy_row(*operation[1:])
+        elif operation[0] == "remove":
+            book.remove_buy_row(operation[1])
+        else:
+            book.get_buy_rows()[:1]  # pylint: disable=expression-not-assigned
+
+
+def run_indexed(ops: list[tuple]) -> None:
+    """Replays the operations on the price-indexed DeepOrderBook"""
+    book = DeepOrderBook()
+    for operation in ops:
+        if operation[0] == "update":
+            book.update_buy_row(*operation[1:])
+        elif operation[0] == "remove":
+            book.remove_buy_row(operation[1])
+        else:
+            book.get_best_buy_row()
+
+
+def main():
+    """Prints the time per operation of both layouts for each book depth"""
+    depths = [int(x) for x in sys.argv[1:]] or [10, 100, 1000]
+    for depth in depths:
+        ops = operations(depth)
+        timings = {}
+        for name, run in (("list", run_list), ("price-indexed", run_indexed)):
+            timings[name] = min(timeit.repeat(
+                lambda r=run, o=ops: r(o), number=1, repeat=3
+            )) / OPERATIONS
+        print(f"depth {depth}")
+        for name, elapsed in timings.items():
+            print(f"  {name:<16}{elapsed * 1e6:>10.2f} us/op\
+{timings['list'] / elapsed:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
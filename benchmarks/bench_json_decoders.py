@@ -0,0 +1,66 @@
+"""
+Compares the JSON decoders on recorded TSETMC payloads. \
+Pass the paths of recorded response bodies as arguments, \
+otherwise a synthetic market watch payload is used.
+Run using: python -m benchmarks.bench_json_decoders [payload.json ...]
+"""
+import json
+import sys
+import timeit
+from tse_utils.tsetmc.json_backends import (
+    JsonDecoder,
+    StdlibJsonDecoder,
+    OrjsonDecoder
+)
+
+
+def synthetic_market_watch(instruments: int = 1500) -> bytes:
+    """Builds a market watch body with the shape of GetMarketWatch"""
+    return json.dumps({"marketwatch": [{
+        "insCode": str(46348559193224090 + x), "insID": f"IRO1TEST{x:04}",
+        "lva": f"نماد{x}", "lvc": f"شرکت آزمایشی {x}", "eps": 1200,
+        "pe": 5.5, "pmd": 7000, "pmo": 7010, "qmd": 163213, "qmo": 25000,
+        "zmd": 12, "zmo": 3, "pdv": 7005, "pcl": 7003, "py": 6900,
+        "pf": 6950, "pmx": 7100, "pmn": 6900, "qtc": 520000000000,
+        "qtj": 74309985, "ztt": 3255, "ztd": 800000000000, "bv": 5000000,
+        "pMax": 7240, "pMin": 6560, "hEven": 122959,
+        "blDs": [{
+            "number": row, "rid": 11679170214 + row, "zmd": 12, "qmd": 163213,
+            "pmd": 7000 - row, "zmo": 3, "qmo": 25000, "pmo": 7010 + row
+        } for row in range(1, 6)]
+    } for x in range(instruments)]}, ensure_ascii=False).encode("utf-8")
+
+
+def available_decoders() -> list[JsonDecoder]:
+    """Returns the decoders that can be used in this environment"""
+    decoders = [StdlibJsonDecoder()]
+    try:
+        decoders.append(OrjsonDecoder())
+    except ImportError:
+        print("orjson is not installed, skipping it.")
+    return decoders
+
+
+def main():
+    """Prints the decoding time of each decoder on each payload"""
+    payloads = {"synthetic GetMarketWatch": synthetic_market_watch()} \
+        if len(sys.argv) == 1 else {}
+    for path in sys.argv[1:]:
+        with open(path, "rb") as file:
+            payloads[path] = file.read()
+    for title, content in payloads.items():
+        print(f"{title} ({len(content) / 1e6:.2f} MB)")
+        baseline = min(timeit.repeat(
+            lambda c=content: json.loads(c.decode("utf-8")), number=5, repeat=5
+        )) / 5
+        print(f"  {'json.loads(text)':<20}{baseline * 1e3:>10.2f} ms")
+        for decoder in available_decoders():
+            elapsed = min(timeit.repeat(
+                lambda d=decoder, c=content: d.decode(c), number=5, repeat=5
+            )) / 5
+            print(f"  {decoder.name:<20}{elapsed * 1e3:>10.2f} ms\
+{baseline / elapsed:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Compares memory and construction time of the slotted tick models \
+with dict-backed replicas of their previous layout.
+Run using: python -m benchmarks.bench_tick_models
+"""
+# pylint: disable=duplicate-code
+# The replicas intentionally repeat the models they are compared with
+from dataclasses import dataclass
+from datetime import time
+import timeit
+import tracemalloc
+from tse_utils.tsetmc.models import TradeIntraday, BestLimitsHistoryRow
+from tse_utils.tsetmc.dates import h_even_to_time
+
+ROWS = 100_000
+
+TRADE_RAW = {
+    "pTran": 7250, "qTitTran": 100790, "nTran": 15552,
+    "hEven": 122606, "canceled": 0
+}
+BEST_LIMITS_RAW = {
+    "number": 5, "refID": 11679170214, "hEven": 84536,
+    "zOrdMeDem": 12, "qTitMeDem": 163213, "pMeDem": 7000,
+    "zOrdMeOf": 3, "qTitMeOf": 25000, "pMeOf": 7010
+}
+
+
+@dataclass
+class DictTradeIntraday:
+    """Dict-backed replica of the previous TradeIntraday"""
+    price: int = None
+    volume: int = None
+    index: int = None
+    time: time = None
+    is_canceled: bool = None
+
+    def __init__(self, tsetmc_raw_data):
+        self.price = tsetmc_raw_data["pTran"]
+        self.volume = tsetmc_raw_data["qTitTran"]
+        self.index = tsetmc_raw_data["nTran"]
+        self.time = h_even_to_time(tsetmc_raw_data["hEven"])
+        self.is_canceled = bool(tsetmc_raw_data["canceled"])
+
+
+@dataclass
+class DictOrderBookRowSide:
+    """Dict-backed replica of the previous OrderBookRowSide"""
+    num: int = 0
+    volume: int = 0
+    price: int = 0
+
+
+@dataclass
+class DictOrderBookRow:
+    """Dict-backed replica of the previous OrderBookRow"""
+    demand: DictOrderBookRowSide
+    supply: DictOrderBookRowSide
+
+    def __init__(self, demand=None, supply=None):
+        self.demand = demand if demand else DictOrderBookRowSide()
+        self.supply = supply if supply else DictOrderBookRowSide()
+
+
+@dataclass
+class DictBestLimitsRow(DictOrderBookRow):
+    """Dict-backed replica of the previous BestLimitsRow"""
+
+    def __init__(self, tsetmc_raw_data):
+        DictOrderBookRow.__init__(
+            self=self,
+            demand=DictOrderBookRowSide(
+                num=tsetmc_raw_data["zOrdMeDem"],
+                volume=tsetmc_raw_data["qTitMeDem"],
+                price=tsetmc_raw_data["pMeDem"]
+            ),
+            supply=DictOrderBookRowSide(
+                num=tsetmc_raw_data["zOrdMeOf"],
+                volume=tsetmc_raw_data["qTitMeOf"],
+                price=tsetmc_raw_data["pMeOf"]
+            )
+        )
+
+
+@dataclass
+class DictBestLimitsHistoryRow(DictBestLimitsRow):
+    """Dict-backed replica of the previous BestLimitsHistoryRow"""
+    row_number: int = None
+    record_time: time = None
+    reference_id: int = None
+
+    def __init__(self, tsetmc_raw_data, *args):
+        self.row_number = tsetmc_raw_data["number"]
+        self.reference_id = tsetmc_raw_data["refID"]
+        self.record_time = h_even_to_time(tsetmc_raw_data["hEven"])
+        DictBestLimitsRow.__init__(
+            self=self,
+            tsetmc_raw_data=tsetmc_raw_data,
+            *args
+        )
+
+
+def bytes_per_row(model, raw: dict) -> float:
+    """Measures the allocated bytes per constructed row"""
+    tracemalloc.start()
+    rows = [model(raw) for _ in range(ROWS)]
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del rows
+    return allocated / ROWS
+
+
+def microseconds_per_row(model, raw: dict) -> float:
+    """Measures the construction time per row"""
+    return min(timeit.repeat(lambda: model(raw), number=ROWS, repeat=5)) \
+        / ROWS * 1e6
+
+
+def main():
+    """Prints the comparison table"""
+    print(f"{'model':<40}{'bytes/row':>12}{'us/row':>10}")
+    for model, raw in (
+        (DictTradeIntraday, TRADE_RAW),
+        (TradeIntraday, TRADE_RAW),
+        (DictBestLimitsHistoryRow, BEST_LIMITS_RAW),
+        (BestLimitsHistoryRow, BEST_LIMITS_RAW),
+    ):
+        print(f"{model.__name__:<40}{bytes_per_row(model, raw):>12.1f}\
+{microseconds_per_row(model, raw):>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
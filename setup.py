@@ -12,6 +12,7 @@ setuptools.setup(
         data catching and processing.",
     packages=setuptools.find_packages(),
     install_requires=["httpx", "beautifulsoup4", "lxml"],
+    extras_require={"numpy": ["numpy"], "orjson": ["orjson"]},
     classifiers=[
         "Programming Language :: Python :: 3",
         "Operating System :: POSIX :: Linux",
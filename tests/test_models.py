@@ -1,7 +1,48 @@
 """Test the models in tse_utils library"""
 import unittest
 from datetime import datetime, date
-from tse_utils.models import trader, instrument, realtime, enums
+from tse_utils.models import trader, instrument, realtime, enums, valuation
+
+
+class ImplementedTrader(trader.Trader):
+    """A sample from abstract trader class"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+    async def connect(self) -> None:
+        pass
+
+    async def connect_looper(
+            self,
+            interval: int = 3,
+            max_trial=10
+    ) -> None:
+        pass
+
+    async def disconnect(self) -> None:
+        pass
+
+    async def get_server_datetime(self) -> datetime:
+        pass
+
+    async def pull_trader_data(self):
+        pass
+
+    async def subscribe_instruments_list(
+            self,
+            instruments: list[instrument.Instrument]
+    ):
+        pass
+
+    async def order_send(self, order: trader.Order):
+        pass
+
+    async def order_cancel(self, order: trader.Order):
+        pass
+
+    async def order_edit(self, order: trader.Order, quantity: int, price: int):
+        pass
 
 
 class TestModels(unittest.TestCase):
@@ -109,6 +150,64 @@ class TestModels(unittest.TestCase):
         self.assertTrue(portfolio.get_position(
             self.sample_instrument.identification.isin) is None)
 
+    def test_portfolio_bulk_update(self):
+        """Test bulk updates of portfolio securities in both modes"""
+        for copy_on_write in (False, True):
+            portfolio = trader.Portfolio(copy_on_write=copy_on_write)
+            portfolio.bulk_update_assets([
+                trader.PortfolioSecurity(isin=f"IRO1TEST000{x}", quantity=x)
+                for x in range(1, 4)
+            ])
+            self.assertEqual(portfolio.get_asset_quantity("IRO1TEST0002"), 2)
+            portfolio.bulk_update_assets([
+                trader.PortfolioSecurity(isin="IRO1TEST0003", quantity=30),
+                trader.PortfolioSecurity(isin="IRO1TEST0004", quantity=4)
+            ], replace=True)
+            self.assertEqual(
+                [(x.isin, x.quantity) for x in portfolio.get_all_assets()],
+                [("IRO1TEST0003", 30), ("IRO1TEST0004", 4)]
+            )
+            self.assertFalse(portfolio.has_asset("IRO1TEST0001"))
+            portfolio.bulk_update_positions([
+                trader.PortfolioSecurity(isin="IRO9TEST0001", quantity=-5)
+            ])
+            self.assertEqual(portfolio.get_position_quantity("IRO9TEST0001"), -5)
+            self.assertEqual(len(portfolio.get_all_positions()), 1)
+
+    def test_portfolio_valuation(self):
+        """Test that the incremental valuation matches a full recomputation"""
+        for copy_on_write in (False, True):
+            portfolio = trader.Portfolio(copy_on_write=copy_on_write)
+            portfolio.bulk_update_assets([
+                trader.PortfolioSecurity(
+                    isin="IRO1TEST0001", quantity=100, position_open_price=900,
+                    instrument_close_price=1000, instrument_last_price=1100),
+                trader.PortfolioSecurity(
+                    isin="IRO1TEST0002", quantity=50, instrument_close_price=200)
+            ])
+            portfolio.update_position(trader.PortfolioSecurity(
+                isin="IRO9TEST0001", quantity=-10, position_open_price=500,
+                instrument_close_price=450, instrument_last_price=400))
+            self.assertEqual(portfolio.get_valuation(), valuation.PortfolioValuation(
+                market_value=110000 + 10000 - 4000,
+                unrealized_pnl=20000 + 1000,
+                daily_pnl=10000 + 500,
+                long_exposure=120000,
+                short_exposure=4000
+            ))
+            portfolio.update_prices("IRO1TEST0002", last_price=220)
+            portfolio.update_asset(trader.PortfolioSecurity(
+                isin="IRO1TEST0001", quantity=40, position_open_price=900,
+                instrument_close_price=1000, instrument_last_price=1100))
+            portfolio.remove_position("IRO9TEST0001")
+            expected = valuation.PortfolioValuation()
+            for security in portfolio.get_all_assets() + portfolio.get_all_positions():
+                expected += valuation.PortfolioValuation.of_security(security)
+            self.assertEqual(portfolio.get_valuation(), expected)
+            self.assertEqual(expected.market_value, 44000 + 11000)
+            portfolio.empty_asset()
+            self.assertEqual(portfolio.get_valuation(), valuation.PortfolioValuation())
+
     def test_deep_order_book_dynamics(self):
         """Test dynamics of deep order books"""
         deep_order_book = realtime.DeepOrderBook()
@@ -148,48 +247,37 @@ class TestModels(unittest.TestCase):
         self.assertFalse(buy_rows)
         self.assertFalse(sell_rows)
 
-    def test_trader_order_dynamics(self):
-        """Test dynamics of orders"""
-        class ImplementedTrader(trader.Trader):
-            """A sample from abstract trader class"""
-
-            def __init__(self, *args, **kwargs):
-                super().__init__(*args, **kwargs)
-
-            async def connect(self) -> None:
-                pass
-
-            async def connect_looper(
-                    self,
-                    interval: int = 3,
-                    max_trial=10
-            ) -> None:
-                pass
-
-            async def disconnect(self) -> None:
-                pass
-
-            async def get_server_datetime(self) -> datetime:
-                pass
-
-            async def pull_trader_data(self):
-                pass
-
-            async def subscribe_instruments_list(
-                    self,
-                    instruments: list[instrument.Instrument]
-            ):
-                pass
-
-            async def order_send(self, order: trader.Order):
-                pass
-
-            async def order_cancel(self, order: trader.Order):
-                pass
+    def test_deep_order_book_best_rows(self):
+        """Test best rows and top n views of deep order books"""
+        deep_order_book = realtime.DeepOrderBook()
+        self.assertIsNone(deep_order_book.get_best_buy_row())
+        for price in (950, 900, 1000, 980):
+            deep_order_book.update_buy_row(1, 100, price)
+        for price in (1060, 1010, 1110):
+            deep_order_book.update_sell_row(1, 100, price)
+        deep_order_book.update_buy_row(5, 500, 1000)
+        self.assertEqual(deep_order_book.get_best_buy_row().volume, 500)
+        self.assertEqual(deep_order_book.get_best_sell_row().price, 1010)
+        self.assertEqual(
+            [x.price for x in deep_order_book.get_buy_rows(count=2)], [1000, 980])
+        self.assertEqual(
+            [x.price for x in deep_order_book.get_sell_rows(count=5)], [1010, 1060, 1110])
+        self.assertEqual(deep_order_book.get_buy_rows(count=0), [])
+        deep_order_book.remove_buy_row(price=1000)
+        self.assertEqual(deep_order_book.get_best_buy_row().price, 980)
 
-            async def order_edit(self, order: trader.Order, quantity: int, price: int):
-                pass
+    def test_order_book_rows_are_slotted(self):
+        """Test that order book rows keep their attribute API without a __dict__"""
+        row = realtime.OrderBookRow(
+            demand=realtime.OrderBookRowSide(num=1, volume=100, price=1000))
+        self.assertFalse(hasattr(row, "__dict__"))
+        self.assertFalse(hasattr(row.demand, "__dict__"))
+        row.supply.volume = 200
+        self.assertEqual(row.supply, realtime.OrderBookRowSide(volume=200))
+        self.assertEqual(row.demand.price, 1000)
 
+    def test_trader_order_dynamics(self):
+        """Test dynamics of orders"""
         sample_trader = ImplementedTrader(
             credentials=trader.TraderCredentials(
                 api=trader.TradingAPI(),
@@ -257,6 +345,154 @@ class TestModels(unittest.TestCase):
         sample_trader.empty_orders()
         self.assertFalse(sample_trader.get_orders())
 
+    def test_order_fill_aggregates(self):
+        """Test the running fill aggregates of an order"""
+        isin = self.sample_instrument.identification.isin
+        order = trader.Order(
+            oms_id=1, isin=isin, side=enums.TradeSide.BUY, quantity=100, price=1000)
+        self.assertIsNone(order.fill.vwap)
+        order.add_trade(trader.MicroTrade(
+            isin=isin, quantity=30, price=1000, datetime=datetime(2023, 1, 1, 9, 5)))
+        fill = order.fill
+        order.add_trade(trader.MicroTrade(
+            isin=isin, quantity=10, price=1040, datetime=datetime(2023, 1, 1, 9, 1)))
+        self.assertEqual((fill.quantity, fill.trade_count), (30, 1))
+        self.assertEqual(order.fill.quantity, 40)
+        self.assertEqual(order.fill.notional, 40400)
+        self.assertEqual(order.fill.vwap, 1010)
+        self.assertEqual(order.fill.last_datetime, datetime(2023, 1, 1, 9, 5))
+        self.assertEqual(order.get_unfilled_quantity(), 60)
+
+    def test_trader_order_index(self):
+        """Test that order lookups follow additions, removals and key changes"""
+        isin = self.sample_instrument.identification.isin
+        for copy_on_write in (False, True):
+            sample_trader = ImplementedTrader(
+                credentials=trader.TraderCredentials(
+                    api=trader.TradingAPI(), username="aaa"),
+                copy_on_write=copy_on_write
+            )
+            for oms_id, side in enumerate(
+                    (enums.TradeSide.BUY, enums.TradeSide.SELL, enums.TradeSide.BUY), 1):
+                order = trader.Order(
+                    oms_id=oms_id, isin=isin, side=side, quantity=10, price=5,
+                    copy_on_write=copy_on_write)
+                order.client_id = f"c{oms_id}"
+                order.state = enums.OrderState.SENT_TO_CORE
+                sample_trader.add_order(order)
+            # pylint: disable=protected-access
+            # Checks that copy-on-write replaces the groups instead of changing them
+            sent_group = sample_trader._orders.by_state[enums.OrderState.SENT_TO_CORE]
+            sample_trader.get_order(1).state = enums.OrderState.ACTIVE
+            sample_trader.get_order(2).state = enums.OrderState.ACTIVE
+            self.assertEqual(len(sent_group), 3 if copy_on_write else 1)
+            sample_trader.get_order(3).hon = "h3"
+            self.assertEqual(
+                [x.oms_id for x in sample_trader.get_active_orders(
+                    isin=isin, side=enums.TradeSide.BUY)], [1])
+            self.assertEqual(sample_trader.count_orders(state=enums.OrderState.ACTIVE), 2)
+            self.assertEqual(sample_trader.count_orders(isin=isin), 3)
+            self.assertEqual(sample_trader.get_order_by_client_id("c2").oms_id, 2)
+            self.assertEqual(sample_trader.get_order_by_hon("h3").oms_id, 3)
+            removed = sample_trader.get_order(1)
+            sample_trader.remove_order(1)
+            removed.state = enums.OrderState.CANCELED
+            self.assertIsNone(sample_trader.get_order_by_client_id("c1"))
+            self.assertEqual(sample_trader.get_orders(
+                state=enums.OrderState.CANCELED), [])
+            self.assertEqual(len(sample_trader.get_orders(
+                lambda x: x.side == enums.TradeSide.SELL, isin=isin)), 1)
+            self.assertEqual(sample_trader.count_orders(
+                isin="IRO1NONE0001", state=enums.OrderState.ACTIVE), 0)
+            # Filters may change the orders they are given without deadlocking
+            self.assertEqual(len(sample_trader.get_orders(
+                lambda x: setattr(x, "state", enums.OrderState.ACTIVE) is None)), 2)
+            self.assertEqual(sample_trader.get_order_custom(
+                lambda x: setattr(x, "hon", f"h{x.oms_id}") is None and x.oms_id == 2).hon, "h2")
+            self.assertEqual(sample_trader.count_orders(state=enums.OrderState.ACTIVE), 2)
+
+    def test_trader_order_archive(self):
+        """Test that terminal orders move to a bounded archive"""
+        isin = self.sample_instrument.identification.isin
+        sample_trader = ImplementedTrader(
+            credentials=trader.TraderCredentials(api=trader.TradingAPI(), username="aaa"),
+            order_archive_size=2
+        )
+        for oms_id in range(1, 5):
+            order = trader.Order(
+                oms_id=oms_id, isin=isin, side=enums.TradeSide.BUY, quantity=10, price=5)
+            order.state = enums.OrderState.ACTIVE
+            sample_trader.add_order(order)
+        sample_trader.get_order(1).add_trade(trader.MicroTrade(isin=isin, quantity=10))
+        sample_trader.get_order(1).state = enums.OrderState.EXECUTED
+        late_order = sample_trader.get_order(2)
+        late_order.state = enums.OrderState.CANCELED
+        self.assertIsNone(sample_trader.get_order(1))
+        self.assertEqual(len(sample_trader.get_orders()), 2)
+        self.assertEqual(sample_trader.count_orders(state=enums.OrderState.ACTIVE), 2)
+        self.assertEqual(sample_trader.count_orders(state=enums.OrderState.EXECUTED), 0)
+        archived = sample_trader.get_archived_order(1)
+        self.assertEqual(archived.state, enums.OrderState.EXECUTED)
+        self.assertEqual(len(archived.trades), 1)
+        # A trade reported after the terminal state still reaches the record
+        late_order.add_trade(trader.MicroTrade(isin=isin, quantity=4, price=5))
+        archived = sample_trader.get_archived_order(2)
+        self.assertEqual(archived.state, enums.OrderState.CANCELED)
+        self.assertEqual(len(archived.trades), 1)
+        self.assertEqual(archived.fill.quantity, 4)
+        sample_trader.get_order(3).state = enums.OrderState.ERROR
+        self.assertIsNone(sample_trader.get_archived_order(1))
+        self.assertEqual(
+            [x.oms_id for x in sample_trader.get_archived_orders()], [2, 3])
+        order = trader.Order(
+            oms_id=4, isin=isin, side=enums.TradeSide.BUY, quantity=10, price=5)
+        order.state = enums.OrderState.CANCELED
+        sample_trader.add_order(order)
+        self.assertFalse(sample_trader.get_orders())
+        # pylint: disable=protected-access
+        # Checks that archived orders leave every group of the index
+        self.assertEqual(sample_trader._orders.by_state, {})
+        self.assertEqual(sample_trader._orders.by_isin, {})
+        self.assertEqual(sample_trader.get_archived_order(4).state, enums.OrderState.CANCELED)
+
+    def test_copy_on_write_snapshots(self):
+        """Test that copy-on-write readers get snapshots unaffected by later writes"""
+        isin = self.sample_instrument.identification.isin
+        deep_order_book = realtime.DeepOrderBook(copy_on_write=True)
+        deep_order_book.update_buy_row(1, 100, 1000)
+        deep_order_book.update_buy_row(2, 200, 990)
+        buy_rows = deep_order_book.get_buy_rows()
+        deep_order_book.update_buy_row(3, 300, 1000)
+        deep_order_book.remove_buy_row(990)
+        self.assertEqual([(x.price, x.volume) for x in buy_rows], [(1000, 100), (990, 200)])
+        self.assertEqual(deep_order_book.get_best_buy_row().volume, 300)
+        self.assertEqual(len(deep_order_book.get_buy_rows(count=5)), 1)
+        portfolio = trader.Portfolio(copy_on_write=True)
+        portfolio.update_asset(trader.PortfolioSecurity(isin=isin, quantity=100))
+        assets = portfolio.get_all_assets()
+        portfolio.update_asset(trader.PortfolioSecurity(isin=isin, quantity=200))
+        self.assertEqual(assets[0].quantity, 100)
+        self.assertEqual(portfolio.get_asset_quantity(isin), 200)
+        portfolio.remove_asset(isin)
+        self.assertFalse(portfolio.has_asset(isin))
+        order = trader.Order(
+            oms_id=1, isin=isin, side=enums.TradeSide.BUY, quantity=10, price=5,
+            copy_on_write=True)
+        order.add_trade(trader.MicroTrade(isin=isin, quantity=4, price=5))
+        trades = order.get_trades()
+        order.add_trade(trader.MicroTrade(isin=isin, quantity=6, price=5))
+        self.assertEqual((len(trades), len(order.get_trades())), (1, 2))
+        sample_trader = ImplementedTrader(
+            credentials=trader.TraderCredentials(api=trader.TradingAPI(), username="aaa"),
+            copy_on_write=True
+        )
+        self.assertTrue(sample_trader.portfolio.copy_on_write)
+        sample_trader.add_order(order)
+        orders = sample_trader.get_orders()
+        sample_trader.remove_order(1)
+        self.assertEqual(len(orders), 1)
+        self.assertIsNone(sample_trader.get_order(1))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,11 +1,54 @@
 """Test tsetmc and tse_client modules in tse_utils library"""
+# pylint: disable=too-many-lines
+# The offline tests of every tsetmc utility share this module
+import asyncio
+import json
+import os
+import tempfile
 import unittest
-from datetime import datetime, date, time
-from time import sleep
+from datetime import datetime, date, time, timedelta
+from time import sleep, monotonic
 import httpx
-from tse_utils.tsetmc import TsetmcScraper
+from tse_utils.tsetmc import (
+    TsetmcScraper,
+    RateLimiter,
+    MarketWatchSession,
+    ResponseDiskCache,
+    MemoryCache,
+    is_closed_day,
+    to_structured_array,
+    CLOSING_PRICE_DAILY_FIELDS,
+    d_even_to_date,
+    h_even_to_time,
+    even_to_datetime,
+    even_to_datetime64,
+    MarketWatchTradeData,
+    LazyMarketWatchTradeData,
+    StdlibJsonDecoder,
+    default_json_decoder,
+    JsonArrayStreamParser,
+    TEHRAN_TIMEZONE,
+    date_to_d_even,
+    BackfillPipeline,
+    BackfillManifest,
+    HistoryStore,
+    ClosingPriceDaily,
+    TickStore,
+    TRADE_INTRADAY_FIELDS,
+    BEST_LIMITS_HISTORY_FIELDS,
+    PriceAdjustment,
+    InstrumentShareChange,
+    adjust_daily_history,
+    match_share_changes,
+    BestLimitsHistoryRow,
+    OrderBookReplay,
+    TradeIntraday,
+    BarAggregator,
+    aggregate_bars
+)
 from tse_utils.tse_client import TseClientScraper
-from tse_utils.models import instrument
+from tse_utils.models import instrument, realtime
+from tse_utils.models.enums import AdjustmentMode
 
 
 class TestTSETMC(unittest.IsolatedAsyncioTestCase):
@@ -378,5 +421,603 @@ class TestTSETMC(unittest.IsolatedAsyncioTestCase):
                 sleep(1)
 
 
+def sample_market_watch_item(ins_code: str, last_price: int, h_even: int) -> dict:
+    """Builds a raw market watch item in the TSETMC format"""
+    return {
+        "insCode": ins_code, "lva": ins_code, "insID": ins_code, "lvc": ins_code,
+        "ztd": 1000, "bv": 1, "pMax": 1100, "pMin": 900, "py": 1000,
+        "pdv": last_price, "pf": 1000, "pcl": 1000, "pmx": 1050, "pmn": 950,
+        "qtc": 1000, "qtj": 1, "ztt": 1, "eps": 10, "hEven": h_even,
+        "blDs": [{
+            "zmd": 1, "qmd": 10, "pmd": 990, "zmo": 2, "qmo": 20, "pmo": 1010,
+            "rid": h_even
+        }]
+    }
+
+
+class TestTsetmcOffline(unittest.IsolatedAsyncioTestCase):
+    """Test tsetmc utilities that do not need a connection to TSETMC"""
+
+    async def test_get_many(self):
+        """Test bounded concurrency bulk fetch with partial failures"""
+        running, peak = 0, 0
+
+        async def endpoint(tsetmc_code: str, factor: int = 1):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            if tsetmc_code == "bad":
+                raise ValueError(tsetmc_code)
+            return int(tsetmc_code) * factor
+
+        codes = ["3", "1", "bad", "2"] * 5
+        async with TsetmcScraper() as tsetmc:
+            result = await tsetmc.get_many(
+                endpoint, codes, max_concurrency=3, factor=10)
+        self.assertTrue(peak <= 3)
+        self.assertEqual([x.tsetmc_code for x in result.items], codes)
+        self.assertEqual(result.items[0].result, 30)
+        self.assertIsInstance(result.items[2].error, ValueError)
+        self.assertEqual(result.stats.total, 20)
+        self.assertEqual(result.stats.failed, 5)
+        self.assertEqual(len(result.failures()), 1)
+        self.assertTrue(result.stats.latency_p50 <= result.stats.latency_p99)
+        self.assertTrue(result.stats.throughput() > 0)
+
+
+    async def test_rate_limiter(self):
+        """Test global and per-endpoint pacing of the shared rate limiter"""
+        limiter = RateLimiter(
+            rate=100, burst=1,
+            endpoint_limits={"GetClosingPriceInfo": (25, 1)}
+        )
+        start = monotonic()
+        await asyncio.gather(*(limiter.acquire() for _ in range(6)))
+        self.assertTrue(0.04 <= monotonic() - start < 0.5)
+        start = monotonic()
+        await asyncio.gather(*(
+            limiter.acquire("GetClosingPriceInfo") for _ in range(4)
+        ))
+        self.assertTrue(0.11 <= monotonic() - start < 0.8)
+        limiter.report_pushback(retry_after=0.2)
+        start = monotonic()
+        await limiter.acquire()
+        self.assertTrue(monotonic() - start >= 0.19)
+        limiter = RateLimiter(rate=10, burst=1)
+        await limiter.acquire()
+        limiter.report_pushback(retry_after=0.3)
+        start = monotonic()
+        times = []
+
+        async def acquire() -> None:
+            await limiter.acquire()
+            times.append(monotonic() - start)
+
+        await asyncio.gather(*(acquire() for _ in range(4)))
+        self.assertTrue(times[0] >= 0.29)
+        for previous, current in zip(times, times[1:]):
+            self.assertTrue(current - previous >= 0.08)
+
+
+    async def test_market_watch_session(self):
+        """Test merging market watch deltas and reporting changed instruments"""
+        requests = []
+        responses = [
+            [sample_market_watch_item("1", 1000, 90000),
+             sample_market_watch_item("2", 2000, 90001)],
+            [sample_market_watch_item("1", 1000, 90000),
+             sample_market_watch_item("2", 2010, 90100)],
+            []
+        ]
+
+        async def fetch_raw(ref_id: int, h_even: int, timeout: int):
+            requests.append((ref_id, h_even, timeout))
+            return {"marketwatch": responses[len(requests) - 1]}
+
+        session = MarketWatchSession(fetch_raw=fetch_raw)
+        self.assertEqual(len(await session.poll()), 2)
+        changed = await session.poll()
+        self.assertEqual(len(changed), 1)
+        self.assertEqual(changed[0].intraday_trade_candle.last_price, 2010)
+        self.assertFalse(await session.poll())
+        self.assertEqual(requests[0][:2], (0, 0))
+        self.assertEqual(requests[1][:2], (90001, 90001))
+        self.assertEqual(requests[2][:2], (90100, 90100))
+        self.assertEqual(len(session), 2)
+        self.assertEqual(
+            session.get("1").intraday_trade_candle.last_price, 1000)
+
+    async def test_market_watch_best_limits_delta(self):
+        """Test that a delta with a partial blDs keeps the unchanged levels"""
+        def level(number: int, volume: int) -> dict:
+            return {
+                "number": number, "rid": 100 * volume + number, "zmd": 1, "qmd": volume,
+                "pmd": 1000 - number, "zmo": 1, "qmo": 10, "pmo": 1000 + number
+            }
+
+        full = {**sample_market_watch_item("1", 1000, 90000),
+                "blDs": [level(x, 10) for x in range(1, 4)]}
+        responses = [[full], [{"insCode": "1", "hEven": 90100, "blDs": [level(2, 50)]}]]
+
+        async def fetch_raw(**_):
+            return {"marketwatch": responses.pop(0)}
+
+        session = MarketWatchSession(fetch_raw=fetch_raw)
+        await session.poll()
+        self.assertEqual(len(await session.poll()), 1)
+        rows = session.get("1").orderbook.rows
+        self.assertEqual([x.demand.volume for x in rows], [10, 50, 10])
+        self.assertEqual(session.ref_id, 5002)
+
+
+    def test_response_disk_cache(self):
+        """Test immutable and TTL based entries of the disk cache"""
+        with tempfile.TemporaryDirectory() as directory:
+            cache = ResponseDiskCache(
+                directory=directory,
+                ttls={"GetInstrumentInfo": 3600, "GetClosingPriceInfo": -1}
+            )
+            self.assertFalse(cache.is_cacheable("GetTradeHistory"))
+            self.assertTrue(cache.is_cacheable("GetTradeHistory", True))
+            cache.set("GetTradeHistory", "1_20230430_True", {"tradeHistory": []})
+            self.assertEqual(
+                cache.get("GetTradeHistory", "1_20230430_True", immutable=True),
+                {"tradeHistory": []}
+            )
+            self.assertIsNone(cache.get("GetTradeHistory", "1_20230430_True"))
+            cache.set("GetInstrumentInfo", "1", {"instrumentInfo": {}})
+            self.assertIsNotNone(cache.get("GetInstrumentInfo", "1"))
+            cache.set("GetClosingPriceInfo", "1", {"closingPriceInfo": {}})
+            self.assertIsNone(cache.get("GetClosingPriceInfo", "1"))
+            cache.clear("GetInstrumentInfo")
+            self.assertIsNone(cache.get("GetInstrumentInfo", "1"))
+            cache.set("GetTradeHistory", "2_20230430_True", {"tradeHistory": []}, True)
+            self.assertIsNone(
+                cache.get("GetTradeHistory", "2_20230430_True", immutable=True))
+            search_cache = ResponseDiskCache(
+                directory=f"{directory}/search", ttls={"GetInstrumentSearch": 3600})
+            for key in ("../../escaped", "a/b", "فولاد:*?"):
+                search_cache.set("GetInstrumentSearch", key, {"instrumentSearch": [key]})
+                self.assertEqual(
+                    search_cache.get("GetInstrumentSearch", key),
+                    {"instrumentSearch": [key]}
+                )
+            self.assertEqual(
+                len(os.listdir(f"{directory}/search/GetInstrumentSearch")), 3)
+            self.assertEqual(os.listdir(f"{directory}/search"), ["GetInstrumentSearch"])
+        self.assertTrue(is_closed_day(date(year=2023, month=4, day=30)))
+        self.assertFalse(is_closed_day(date.today() + timedelta(days=2)))
+
+
+    async def test_memory_cache(self):
+        """Test coalescing, expiry and eviction of the memory cache"""
+        cache = MemoryCache(max_size=2, ttls={"GetInstrumentInfo": -1})
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return len(calls)
+
+        results = await asyncio.gather(*(
+            cache.get_or_fetch("GetInstrumentIdentity", "1", fetch)
+            for _ in range(5)
+        ))
+        self.assertEqual(results, [1] * 5)
+        self.assertEqual(cache.stats.misses, 1)
+        self.assertEqual(cache.stats.coalesced, 4)
+        self.assertEqual(
+            await cache.get_or_fetch("GetInstrumentIdentity", "1", fetch), 1)
+        self.assertEqual(cache.stats.hits, 1)
+        await cache.get_or_fetch("GetInstrumentInfo", "1", fetch)
+        self.assertEqual(
+            await cache.get_or_fetch("GetInstrumentInfo", "1", fetch), 3)
+        await cache.get_or_fetch("GetInstrumentSearch", "x", fetch)
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.stats.evictions, 1)
+
+
+    def test_columnar_closing_price_daily(self):
+        """Test conversion of daily history into a structured array"""
+        raw = [{
+            "dEven": 20230500 + x, "hEven": 122959, "priceYesterday": 900 + x,
+            "priceFirst": 1000, "pClosing": 1000 + x, "pDrCotVal": 1000,
+            "priceMax": 1100, "priceMin": 950, "zTotTran": 10,
+            "qTotCap": 10000000000 * x, "qTotTran5J": 5000
+        } for x in range(10, 0, -1)]
+        array = to_structured_array(
+            raw, CLOSING_PRICE_DAILY_FIELDS, reverse=True)
+        self.assertEqual(len(array), 10)
+        self.assertEqual(array["d_even"].dtype.name, "int32")
+        self.assertEqual(array["trade_value"].dtype.name, "int64")
+        self.assertEqual(array["d_even"][0], 20230501)
+        self.assertEqual(array["close_price"][-1], 1010)
+        self.assertEqual(array["trade_value"][-1], 100000000000)
+
+
+    def test_even_decoding(self):
+        """Test scalar and batch decoding of dEven and hEven integers"""
+        self.assertEqual(d_even_to_date(20230430), date(2023, 4, 30))
+        self.assertIs(d_even_to_date(20230430), d_even_to_date(20230430))
+        self.assertEqual(h_even_to_time(90506), time(9, 5, 6))
+        self.assertEqual(
+            even_to_datetime(20240229, 122606),
+            datetime(2024, 2, 29, 12, 26, 6)
+        )
+        decoded = even_to_datetime64([20230430, 20240229], [90506, 122606])
+        self.assertEqual(
+            decoded.astype(datetime).tolist(),
+            [datetime(2023, 4, 30, 9, 5, 6), datetime(2024, 2, 29, 12, 26, 6)]
+        )
+
+
+    def test_lazy_market_watch_trade_data(self):
+        """Test that lazy market watch data decodes the same as the eager one"""
+        raw = sample_market_watch_item("1", 1010, 93000)
+        lazy = LazyMarketWatchTradeData(tsetmc_raw_data=raw)
+        self.assertFalse(lazy.__dict__.keys() - {"tsetmc_raw_data"})
+        self.assertEqual(lazy.intraday_trade_candle.last_price, 1010)
+        self.assertIn("intraday_trade_candle", lazy.__dict__)
+        self.assertNotIn("orderbook", lazy.__dict__)
+        self.assertIs(lazy.intraday_trade_candle, lazy.intraday_trade_candle)
+        eager = MarketWatchTradeData(tsetmc_raw_data=raw)
+        self.assertIsInstance(lazy, MarketWatchTradeData)
+        self.assertEqual(repr(lazy).replace("Lazy", ""), repr(eager))
+
+
+    async def test_json_decoders(self):
+        """Test that the default and the stdlib decoders agree on bytes input"""
+        content = '{"instrumentSearch": [{"lVal18AFC": "فولاد", "x": 1.5}]}'\
+            .encode("utf-8")
+        self.assertEqual(
+            default_json_decoder().decode(content),
+            StdlibJsonDecoder().decode(content)
+        )
+        async with TsetmcScraper(json_decoder=StdlibJsonDecoder()) as tsetmc:
+            self.assertEqual(tsetmc.json_decoder.name, "json")
+
+    async def test_streaming_closing_price_daily_list(self):
+        """Test incremental parsing of a daily history response in chunks"""
+        rows = [{
+            "insCode": "1", "dEven": 20230430 - x, "hEven": 122959,
+            "priceYesterday": 1000, "priceFirst": 1000, "pDrCotVal": 1000,
+            "pClosing": 1000, "priceMax": 1000, "priceMin": 1000,
+            "zTotTran": x, "qTotCap": 1, "qTotTran5J": 1, "note": "a\\\"]}"
+        } for x in range(7)]
+        content = json.dumps({"closingPriceDaily": rows, "x": [1]}).encode()
+        parser = JsonArrayStreamParser("closingPriceDaily")
+        parsed = []
+        for i in range(0, len(content), 5):
+            parsed += parser.feed(content[i:i + 5])
+        self.assertEqual(parsed, rows)
+        self.assertTrue(parser.done)
+        async with TsetmcScraper() as tsetmc:
+            # pylint: disable=protected-access
+            # Replaces the client with one served from memory
+            tsetmc._TsetmcScraper__client = httpx.AsyncClient(
+                transport=httpx.MockTransport(
+                    lambda request: httpx.Response(200, content=content)
+                ),
+                base_url="https://cdn.tsetmc.com/"
+            )
+            chunks = [x async for x in tsetmc.iter_closing_price_daily_list(
+                tsetmc_code="1", chunk_size=3)]
+        self.assertEqual([len(x) for x in chunks], [3, 3, 1])
+        self.assertEqual(chunks[0][0].last_trade_datetime.date(), date(2023, 4, 30))
+        self.assertEqual(chunks[2][0].trade_num, 6)
+
+    async def test_get_closing_price_daily_tail(self):
+        """Test that only the days after the last stored date are requested"""
+        today = datetime.now(TEHRAN_TIMEZONE).date()
+        rows = [{
+            "insCode": "1", "dEven": date_to_d_even(today - timedelta(days=x)),
+            "hEven": 122959, "priceYesterday": 1000, "priceFirst": 1000,
+            "pDrCotVal": 1000, "pClosing": 1000, "priceMax": 1000,
+            "priceMin": 1000, "zTotTran": x, "qTotCap": 1, "qTotTran5J": 1
+        } for x in range(4)]
+        paths = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            paths.append(request.url.path)
+            days = int(request.url.path.split("/")[-1])
+            return httpx.Response(200, json={"closingPriceDaily": rows[:days]})
+
+        async with TsetmcScraper() as tsetmc:
+            # pylint: disable=protected-access
+            # Replaces the client with one served from memory
+            tsetmc._TsetmcScraper__client = httpx.AsyncClient(
+                transport=httpx.MockTransport(handler),
+                base_url="https://cdn.tsetmc.com/"
+            )
+            tail = await tsetmc.get_closing_price_daily_tail(
+                tsetmc_code="1", last_date=today - timedelta(days=3))
+            empty = await tsetmc.get_closing_price_daily_tail(
+                tsetmc_code="1", last_date=today)
+        self.assertEqual(paths, ["/api/ClosingPrice/GetClosingPriceDailyList/1/3"])
+        self.assertEqual([x.trade_num for x in tail], [2, 1, 0])
+        self.assertEqual(empty, [])
+
+    async def test_backfill_pipeline(self):
+        """Test that a backfill skips non-trading days and resumes from its manifest"""
+        calls, failed = [], set()
+
+        class FakeScraper:
+            """Serves a fixed daily history and fails a unit on its first try"""
+            # pylint: disable=too-few-public-methods, unused-argument
+
+            async def get_closing_price_daily_list(self, tsetmc_code, timeout, days):
+                """Two trading days and a day without trades"""
+                if tsetmc_code == "bad":
+                    raise ValueError(tsetmc_code)
+                if tsetmc_code == "today":
+                    return [realtime.TradeCandle(
+                        trade_num=1, last_trade_datetime=datetime.now(TEHRAN_TIMEZONE)
+                    )]
+                return [realtime.TradeCandle(
+                    trade_num=x, last_trade_datetime=datetime(2023, 4, 30 - x)
+                ) for x in range(3)]
+
+            async def get_trade_intraday_hisory_list(
+                    self, tsetmc_code, query_date, timeout):
+                """Fails on the first call for one of the days"""
+                calls.append((tsetmc_code, query_date))
+                if (tsetmc_code, query_date) == ("2", date(2023, 4, 28)) \
+                        and not failed:
+                    failed.add(tsetmc_code)
+                    raise ValueError(tsetmc_code)
+                return tsetmc_code
+
+        results = []
+        with tempfile.TemporaryDirectory() as directory:
+            pipeline = BackfillPipeline(
+                tsetmc=FakeScraper(),
+                manifest=f"{directory}/manifest.jsonl",
+                endpoints=("get_trade_intraday_hisory_list",),
+                max_concurrency=2,
+                on_result=lambda unit, result: results.append(unit)
+            )
+            progress = await pipeline.run(
+                ["1", "2", "bad"], date(2023, 4, 1), date(2023, 4, 30))
+            self.assertEqual((progress.total, progress.done, progress.failed), (4, 3, 1))
+            self.assertIn("bad", pipeline.plan_failures)
+            self.assertNotIn(date(2023, 4, 30), [x.query_date for x in results])
+            calls.clear()
+            pipeline = BackfillPipeline(
+                tsetmc=FakeScraper(),
+                manifest=BackfillManifest(f"{directory}/manifest.jsonl"),
+                endpoints=("get_trade_intraday_hisory_list",)
+            )
+            progress = await pipeline.run(
+                ["1", "2"], date(2023, 4, 1), date(2023, 4, 30))
+            self.assertEqual((progress.resumed, progress.done), (3, 1))
+            self.assertTrue(progress.units_per_second() > 0)
+            today = datetime.now(TEHRAN_TIMEZONE).date()
+            progress = await pipeline.run(["today"], today - timedelta(days=7), today)
+            self.assertEqual(progress.total, 0)
+        self.assertEqual(calls, [("2", date(2023, 4, 28))])
+
+    async def test_history_store(self):
+        """Test range reads and incremental sync of the local history store"""
+        today = datetime.now(TEHRAN_TIMEZONE).date()
+        requests = []
+
+        def closing_price(days_ago: int) -> ClosingPriceDaily:
+            return ClosingPriceDaily(tsetmc_raw_data={
+                "dEven": date_to_d_even(today - timedelta(days=days_ago)),
+                "hEven": 122959, "priceYesterday": 1000, "priceFirst": 1000,
+                "pDrCotVal": 1000, "pClosing": 1000 + days_ago, "priceMax": 1000,
+                "priceMin": 1000, "zTotTran": 1, "qTotCap": 1, "qTotTran5J": 1
+            })
+
+        class FakeScraper:
+            """Serves a growing closing price history"""
+            # pylint: disable=too-few-public-methods
+            history = [closing_price(x) for x in range(5, 1, -1)]
+
+            async def get_closing_price_daily_list(self, tsetmc_code):
+                """Whole history"""
+                requests.append((tsetmc_code, None))
+                return self.history
+
+            async def get_closing_price_daily_tail(self, tsetmc_code, last_date):
+                """Days after last_date"""
+                requests.append((tsetmc_code, last_date))
+                return [
+                    x for x in self.history
+                    if x.last_trade_datetime.date() > last_date
+                ]
+
+        with tempfile.TemporaryDirectory() as directory:
+            with HistoryStore(f"{directory}/history.db") as store:
+                tsetmc = FakeScraper()
+                written = await store.sync(tsetmc, "1", ("closing_price_daily",))
+                self.assertEqual(written, {"closing_price_daily": 4})
+                tsetmc.history = tsetmc.history + [closing_price(1)]
+                written = await store.sync(tsetmc, "1", ("closing_price_daily",))
+                self.assertEqual(written, {"closing_price_daily": 2})
+                self.assertEqual(requests[1], ("1", today - timedelta(days=3)))
+                self.assertEqual(
+                    store.last_date("closing_price_daily", "1"),
+                    today - timedelta(days=1)
+                )
+            with HistoryStore(f"{directory}/history.db") as store:
+                rows = store.get(
+                    "closing_price_daily", "1",
+                    start=today - timedelta(days=4), end=today - timedelta(days=2)
+                )
+                self.assertEqual([x.close_price for x in rows], [1004, 1003, 1002])
+                self.assertEqual(rows[0], closing_price(4))
+                self.assertEqual(store.get("client_type_daily", "1"), [])
+                self.assertEqual(
+                    list(store.get_columnar("closing_price_daily", "1")["close_price"]),
+                    [1005, 1004, 1003, 1002, 1001]
+                )
+
+    def test_tick_store(self):
+        """Test writing, appending and memory mapping daily tick files"""
+        raw = [{
+            "hEven": 90000 + x, "nTran": x, "pTran": 1000 + x,
+            "qTitTran": 10 * x, "canceled": int(x == 2)
+        } for x in range(1, 6)]
+        ticks = to_structured_array(raw, TRADE_INTRADAY_FIELDS)
+        day = date(2023, 4, 30)
+        with tempfile.TemporaryDirectory() as directory:
+            store = TickStore(directory)
+            store.write("trades", "1", day, ticks[:3])
+            store.append("trades", "1", day, ticks[3:])
+            store.write("trades", "1", date(2023, 4, 29), ticks[:0])
+            mapped = store.read("trades", "1", day)
+            self.assertEqual(len(mapped), 5)
+            self.assertEqual(list(mapped["price"]), list(ticks["price"]))
+            self.assertEqual(mapped["is_canceled"].sum(), 1)
+            self.assertEqual(
+                [(x, len(y)) for x, y in store.scan("trades", "1")],
+                [(date(2023, 4, 29), 0), (day, 5)]
+            )
+            self.assertEqual(store.days("best_limits", "1"), [])
+            del mapped
+
+    async def test_tick_store_sync(self):
+        """Test that only ticks fetched after the close are final"""
+        raw = [{
+            "hEven": 90000 + x, "nTran": x, "pTran": 1000 + x,
+            "qTitTran": 10, "canceled": 0
+        } for x in range(1, 6)]
+        calls = []
+
+        class FakeScraper:
+            """Serves five trades and no best limits"""
+            # pylint: disable=unused-argument
+
+            async def get_trade_intraday_hisory_list(self, **kwargs):
+                """Five trades"""
+                calls.append("trades")
+                return to_structured_array(raw, TRADE_INTRADAY_FIELDS)
+
+            async def get_best_limits_intraday_history_list(self, **kwargs):
+                """An empty response"""
+                calls.append("best_limits")
+                return to_structured_array([], BEST_LIMITS_HISTORY_FIELDS)
+
+        day = date(2023, 4, 30)
+        with tempfile.TemporaryDirectory() as directory:
+            store = TickStore(directory)
+            store.write("trades", "1", day, to_structured_array(raw[:2], TRADE_INTRADAY_FIELDS))
+            self.assertFalse(store.is_final("trades", "1", day))
+            written = await store.sync(FakeScraper(), "1", day)
+            self.assertEqual(written, {"trades": 5})
+            self.assertTrue(store.is_final("trades", "1", day))
+            self.assertFalse(store.has("best_limits", "1", day))
+            calls.clear()
+            self.assertEqual(await store.sync(FakeScraper(), "1", day), {})
+            self.assertEqual(calls, ["best_limits"])
+            today = datetime.now(TEHRAN_TIMEZONE).date()
+            await store.sync(FakeScraper(), "1", today, kinds=("trades",))
+            self.assertTrue(store.has("trades", "1", today))
+            self.assertFalse(store.is_final("trades", "1", today))
+
+    def test_adjust_daily_history(self):
+        """Test full and dividend-only backward adjustment factors"""
+        candles = to_structured_array([{
+            "dEven": 20230400 + x, "hEven": 122959, "priceYesterday": 100,
+            "priceFirst": 100, "pClosing": 100, "pDrCotVal": 100,
+            "priceMax": 100, "priceMin": 100, "zTotTran": 1, "qTotCap": 1,
+            "qTotTran5J": 1000
+        } for x in range(5, 0, -1)], CLOSING_PRICE_DAILY_FIELDS)
+        adjustments = [
+            PriceAdjustment({"dEven": 20230403, "pClosingNotAdjusted": 100, "pClosing": 80}),
+            PriceAdjustment({"dEven": 20230405, "pClosingNotAdjusted": 100, "pClosing": 50})
+        ]
+        share_changes = [InstrumentShareChange({
+            "dEven": 20230405, "numberOfShareOld": 1000, "numberOfShareNew": 2000
+        })]
+        full = adjust_daily_history(candles, adjustments)
+        self.assertEqual(list(full["d_even"]), [20230401 + x for x in range(5)])
+        self.assertEqual(
+            [round(x, 6) for x in full["close_price"]], [40, 40, 50, 50, 100])
+        self.assertEqual(list(full["trade_volume"]), [1000] * 5)
+        dividend = adjust_daily_history(
+            candles, adjustments, share_changes, AdjustmentMode.DIVIDEND)
+        self.assertEqual(
+            [round(x, 6) for x in dividend["adjustment_factor"]], [0.8, 0.8, 1, 1, 1])
+        self.assertEqual(list(dividend["trade_volume"]), [1000] * 5)
+        # The capital increase is registered weeks after its price adjustment
+        late_share_changes = [InstrumentShareChange({
+            "dEven": 20230520, "numberOfShareOld": 1000, "numberOfShareNew": 2000
+        })]
+        self.assertEqual(list(match_share_changes(adjustments, late_share_changes)), [1])
+        dividend = adjust_daily_history(
+            candles, adjustments, late_share_changes, AdjustmentMode.DIVIDEND)
+        self.assertEqual(
+            [round(x, 6) for x in dividend["adjustment_factor"]], [0.8, 0.8, 1, 1, 1])
+        full = adjust_daily_history(
+            candles, adjustments, late_share_changes, AdjustmentMode.FULL)
+        self.assertEqual(
+            [round(x, 6) for x in full["trade_volume"]], [2000, 2000, 2000, 2000, 1000])
+        dividend_only = adjust_daily_history(
+            candles, adjustments[:1], [], AdjustmentMode.FULL)
+        self.assertEqual(
+            [round(x, 6) for x in dividend_only["close_price"]], [80, 80, 100, 100, 100])
+        self.assertEqual(
+            [round(x, 6) for x in dividend_only["trade_volume"]], [1000] * 5)
+        with self.assertRaises(ValueError):
+            adjust_daily_history(candles, adjustments, mode=AdjustmentMode.DIVIDEND)
+
+    def test_order_book_replay(self):
+        """Test that binary searched books match the forward replay"""
+        def record(number: int, h_even: int, ref_id: int, price: int):
+            return BestLimitsHistoryRow({
+                "number": number, "hEven": h_even, "refID": ref_id,
+                "zOrdMeDem": 1, "qTitMeDem": 10, "pMeDem": price,
+                "zOrdMeOf": 1, "qTitMeOf": 10, "pMeOf": price + 10
+            })
+
+        records = [
+            record(2, 90001, 3, 980), record(1, 90000, 1, 1000),
+            record(1, 90001, 2, 990), record(1, 90001, 4, 995),
+            record(3, 90105, 5, 970)
+        ]
+        replay = OrderBookReplay(records)
+        self.assertEqual(replay.book_at(time(8, 59)).rows, [realtime.OrderBookRow()] * 5)
+        book = replay.book_at(time(9, 0, 1), reference_id=3)
+        self.assertEqual([x.demand.price for x in book.rows[:3]], [990, 980, 0])
+        self.assertEqual(replay.book_at(time(9, 0, 1)).rows[0].demand.price, 995)
+        snapshots = list(replay.snapshots())
+        self.assertEqual([x[1] for x in snapshots], [1, 2, 3, 4, 5])
+        for at, ref_id, book in snapshots:
+            self.assertEqual(book.rows, replay.book_at(at, ref_id).rows)
+        self.assertEqual(
+            [x[1] for x in replay.snapshots(start=time(9, 0, 1), end=time(9, 0, 1))],
+            [2, 3, 4]
+        )
+
+    def test_bar_aggregation(self):
+        """Test that incremental bars match the vectorized ones"""
+        trades = [TradeIntraday({
+            "pTran": 1000 + x % 7 * 10, "qTitTran": 10 + x, "nTran": x + 1,
+            "hEven": 90000 + x // 60 * 100 + x % 60, "canceled": int(x == 6)
+        }) for x in range(0, 400, 3)]
+        aggregator = BarAggregator(date(2023, 4, 30), resolutions=(1, 60, 300))
+        completed = aggregator.add_many(trades) + aggregator.flush()
+        batch = aggregate_bars(trades, resolutions=(1, 60, 300))
+        for resolution in (1, 60, 300):
+            bars = [x for r, x in completed if r == resolution]
+            array = batch[resolution]
+            self.assertEqual(len(bars), len(array))
+            self.assertEqual(
+                [x.open_trade_datetime.time() for x in bars],
+                [h_even_to_time(x) for x in array["h_even"]]
+            )
+            self.assertEqual([x.close_price for x in bars], list(array["close_price"]))
+            self.assertEqual([x.max_price for x in bars], list(array["max_price"]))
+            self.assertEqual([x.trade_value for x in bars], list(array["trade_value"]))
+            self.assertEqual(bars[1].previous_price, bars[0].close_price)
+        self.assertEqual(len(batch[300]), 2)
+        self.assertEqual(batch[300]["trade_num"].sum(), len(trades) - 1)
+        self.assertEqual(len(aggregate_bars([], resolutions=(60,))[60]), 0)
+
+
 if __name__ == '__main__':
     unittest.main()
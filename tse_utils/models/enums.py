@@ -32,6 +32,10 @@ class OrderState(Enum):
         """Checks if order is active"""
         return self == OrderState.ACTIVE
 
+    def is_terminal(self) -> bool:
+        """Checks if order can no longer change"""
+        return self in (OrderState.EXECUTED, OrderState.CANCELED, OrderState.ERROR)
+
 
 class OrderValidityType(Enum):
     """Validity type for trader orders"""
@@ -72,3 +76,9 @@ class TraderConnectionState(Enum):
             TraderConnectionState.NO_LOGIN,
             TraderConnectionState.LOGGED_OUT
         )
+
+
+class AdjustmentMode(Enum):
+    """Price adjustment modes for historical prices"""
+    FULL = "افزایش سرمایه و سود نقدی"
+    DIVIDEND = "سود نقدی"
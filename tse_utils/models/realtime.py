@@ -2,13 +2,23 @@
 Realtime data for instruments are of different types
 Classes in the realtime module holds such data
 """
+from bisect import bisect_left, insort
+from contextlib import nullcontext
 from dataclasses import dataclass
 from datetime import datetime
 import threading
 from tse_utils.models.enums import Nsc
 
 
-@dataclass
+def read_lock(lock: threading.Lock, copy_on_write: bool):
+    """
+    Returns the lock that readers take: the lock itself, \
+    or nothing in copy-on-write mode where readers use immutable snapshots.
+    """
+    return nullcontext() if copy_on_write else lock
+
+
+@dataclass(slots=True)
 class OrderBookRowSide:
     """A single side on a row of an instrument's order book"""
     num: int = 0
@@ -27,7 +37,7 @@ class OrderBookRowSide:
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class OrderBookRow():
     """
     Contains a single row from an instrument's order book
@@ -160,52 +170,119 @@ class TradeCandle(PriceRange, TradeQuantity):
     last_trade_datetime: datetime = None
 
 
+class _PriceLevels:
+    """
+    Rows of one side of a deep order book, keyed by price, \
+    along with an ascending index of their prices. In copy-on-write mode, \
+    rows are replaced instead of modified and every change publishes \
+    a new snapshot, a tuple of the rows from the best price.
+    """
+
+    def __init__(self, descending: bool, copy_on_write: bool = False):
+        self.descending: bool = descending
+        self.copy_on_write: bool = copy_on_write
+        self.rows: dict[int, OrderBookRowSide] = {}
+        self.prices: list[int] = []
+        self.snapshot: tuple[OrderBookRowSide, ...] = ()
+
+    def __publish(self) -> None:
+        """Publishes the snapshot of the rows in copy-on-write mode"""
+        if self.copy_on_write:
+            self.snapshot = tuple(self.__ordered(None))
+
+    def __ordered(self, count: int) -> list[OrderBookRowSide]:
+        """Returns the best count rows, or all rows, from the best price"""
+        if count is None:
+            count = len(self.prices)
+        prices = self.prices[:-count - 1:-1] if self.descending \
+            else self.prices[:count]
+        return [self.rows[x] for x in prices]
+
+    def update(self, num: int, volume: int, price: int) -> None:
+        """Updates the row of a price if exists and adds it if not"""
+        row = self.rows.get(price)
+        if row is not None and not self.copy_on_write:
+            row.volume = volume
+            row.num = num
+        else:
+            self.rows[price] = OrderBookRowSide(num=num, volume=volume, price=price)
+            if row is None:
+                insort(self.prices, price)
+        self.__publish()
+
+    def remove(self, price: int) -> None:
+        """Removes the row of a price if exists"""
+        if self.rows.pop(price, None) is not None:
+            del self.prices[bisect_left(self.prices, price)]
+            self.__publish()
+
+    def clear(self) -> None:
+        """Removes all rows"""
+        self.rows.clear()
+        self.prices.clear()
+        self.__publish()
+
+    def best(self) -> OrderBookRowSide:
+        """Returns the row with the best price, None if there are no rows"""
+        if self.copy_on_write:
+            snapshot = self.snapshot
+            return snapshot[0] if snapshot else None
+        if not self.prices:
+            return None
+        return self.rows[self.prices[-1] if self.descending else self.prices[0]]
+
+    def top(self, count: int = None) -> list[OrderBookRowSide]:
+        """
+        Returns the best count rows, or all rows, from the best price. \
+        In copy-on-write mode, a slice of the snapshot is returned.
+        """
+        if self.copy_on_write:
+            return self.snapshot[:count]
+        return self.__ordered(count)
+
+
 class DeepOrderBook:
     """
     DeepOrderbook contains all rows of an instrument's orders on both sides.
+    Rows are kept by price with a sorted price index. Finding a price takes \
+    O(log n), updating a row at an existing price O(1), while adding or \
+    removing a price level takes O(n) list shifts. The best rows take O(1) \
+    and the top n rows O(n).
+    In copy_on_write mode, each update publishes immutable snapshots \
+    and readers use them without taking the locks. Reads return tuples \
+    of rows that are never modified afterwards, at the cost of O(n) updates.
     """
 
-    def __init__(self):
-        self._buy_rows: list[OrderBookRowSide] = []
+    def __init__(self, copy_on_write: bool = False):
+        self.copy_on_write: bool = copy_on_write
+        self._buy_rows: _PriceLevels = _PriceLevels(
+            descending=True, copy_on_write=copy_on_write)
         self._buy_rows_lock: threading.Lock = threading.Lock()
-        self._sell_rows: list[OrderBookRowSide] = []
+        self._buy_rows_read_lock = read_lock(self._buy_rows_lock, copy_on_write)
+        self._sell_rows: _PriceLevels = _PriceLevels(
+            descending=False, copy_on_write=copy_on_write)
         self._sell_rows_lock: threading.Lock = threading.Lock()
+        self._sell_rows_read_lock = read_lock(self._sell_rows_lock, copy_on_write)
 
     def update_buy_row(self, num: int, volume: int, price: int) -> None:
         """Updates a single buy row if exists and adds it if not"""
         with self._buy_rows_lock:
-            row = next((x for x in self._buy_rows if x.price == price), None)
-            if row:
-                row.volume = volume
-                row.num = num
-            else:
-                self._buy_rows.append(OrderBookRowSide(
-                    num=num, volume=volume, price=price))
+            self._buy_rows.update(num=num, volume=volume, price=price)
 
     def update_sell_row(self, num: int, volume: int, price: int) -> None:
         """Updates a single sell row if exists and adds it if not"""
         with self._sell_rows_lock:
-            row = next((x for x in self._sell_rows if x.price == price), None)
-            if row:
-                row.volume = volume
-                row.num = num
-            else:
-                self._sell_rows.append(OrderBookRowSide(
-                    num=num, volume=volume, price=price))
+            self._sell_rows.update(num=num, volume=volume, price=price)
 
     def remove_buy_row(self, price: int) -> None:
         """Removes a single buy row"""
         with self._buy_rows_lock:
-            row = next((x for x in self._buy_rows if x.price == price), None)
-            if row:
-                self._buy_rows.remove(row)
+            self._buy_rows.remove(price)
 
     def remove_sell_row(self, price: int) -> None:
         """Removes a single sell row"""
         with self._sell_rows_lock:
-            row = next((x for x in self._sell_rows if x.price == price), None)
-            if row:
-                self._sell_rows.remove(row)
+            self._sell_rows.remove(price)
 
     def empty_buy_rows(self) -> None:
         """Removes all buy rows"""
@@ -217,15 +294,25 @@ class DeepOrderBook:
         with self._sell_rows_lock:
             self._sell_rows.clear()
 
-    def get_buy_rows(self) -> list[OrderBookRowSide]:
-        """Returns a copy of all buy rows"""
-        with self._buy_rows_lock:
-            return sorted(self._buy_rows.copy(), key=lambda x: x.price, reverse=True)
-
-    def get_sell_rows(self) -> list[OrderBookRowSide]:
-        """Returns a copy of all sell rows"""
-        with self._sell_rows_lock:
-            return sorted(self._sell_rows.copy(), key=lambda x: x.price, reverse=False)
+    def get_buy_rows(self, count: int = None) -> list[OrderBookRowSide]:
+        """Returns a copy of all buy rows, or the best count of them"""
+        with self._buy_rows_read_lock:
+            return self._buy_rows.top(count)
+
+    def get_sell_rows(self, count: int = None) -> list[OrderBookRowSide]:
+        """Returns a copy of all sell rows, or the best count of them"""
+        with self._sell_rows_read_lock:
+            return self._sell_rows.top(count)
+
+    def get_best_buy_row(self) -> OrderBookRowSide:
+        """Returns the buy row with the highest price, None if there is none"""
+        with self._buy_rows_read_lock:
+            return self._buy_rows.best()
+
+    def get_best_sell_row(self) -> OrderBookRowSide:
+        """Returns the sell row with the lowest price, None if there is none"""
+        with self._sell_rows_read_lock:
+            return self._sell_rows.best()
 
 
 @dataclass
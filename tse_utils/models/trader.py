@@ -3,8 +3,10 @@ This model contains classes that can be used as interfaces for \
 implementing the trader classes in the future. Each trader instance \
 is responsible for a single account in a specific broker and OMS.
 """
-from dataclasses import dataclass
+from collections import OrderedDict
+from dataclasses import dataclass, replace as dataclass_replace
 from datetime import date, datetime
+from functools import partial
 import threading
 import logging
 from abc import ABC, abstractmethod
@@ -17,6 +19,8 @@ from tse_utils.models.enums import (
     OrderValidityType
 )
 from tse_utils.models import instrument
+from tse_utils.models.realtime import read_lock
+from tse_utils.models.valuation import MarkToMarket, PortfolioValuation
 
 
 @dataclass
@@ -33,6 +37,37 @@ class MicroTrade:
     htn: str = None
 
 
+@dataclass(frozen=True, slots=True)
+class OrderFill:
+    """
+    Running aggregates of an order's trades. A trade without a price \
+    adds its quantity but nothing to the notional.
+    """
+    quantity: int = 0
+    notional: int = 0
+    last_datetime: datetime = None
+    trade_count: int = 0
+
+    @property
+    def vwap(self) -> float:
+        """Volume weighted average price of the fills, None if not filled"""
+        return self.notional / self.quantity if self.quantity else None
+
+    def add(self, trade: MicroTrade) -> "OrderFill":
+        """Returns the aggregates after a new trade"""
+        quantity = trade.quantity or 0
+        last_datetime = self.last_datetime
+        if trade.datetime is not None and \
+                (last_datetime is None or trade.datetime > last_datetime):
+            last_datetime = trade.datetime
+        return OrderFill(
+            quantity=self.quantity + quantity,
+            notional=self.notional + quantity * (trade.price or 0),
+            last_datetime=last_datetime,
+            trade_count=self.trade_count + 1
+        )
+
+
 @dataclass
 class OrderIdentifier:
     """Holds the identifiers of an Order"""
@@ -75,10 +110,38 @@ class OrderValidity:
     """
 
 
+def _indexed_attribute(name: str) -> property:
+    """
+    An order attribute by which traders index their orders. \
+    Setting it notifies the trader holding the order, if any.
+    """
+    private_name = f"_{name}"
+
+    def getter(self):
+        return getattr(self, private_name)
+
+    def setter(self, value):
+        old_value = getattr(self, private_name, None)
+        setattr(self, private_name, value)
+        if self.key_change_listener is not None and old_value != value:
+            self.key_change_listener(self, name, old_value)
+
+    return property(getter, setter)
+
+
 class Order(OrderIdentifier, OrderStatus, OrderQuantity, OrderValidity):
     """
     Holds data for a single order from a trader.
+    In copy_on_write mode, the trades are kept in a tuple that is replaced \
+    on each new trade, and get_trades returns it without taking the lock.
+    The fill aggregates are replaced as a whole on each new trade, \
+    so reading them takes O(1) and no lock in both modes.
     """
+    # pylint: disable=too-many-instance-attributes
+    # The trades have a lock, a read lock and the fill aggregates
+    client_id = _indexed_attribute("client_id")
+    hon = _indexed_attribute("hon")
+    state = _indexed_attribute("state")
 
     # pylint: disable=too-many-arguments
     # The following 6 parameters are the bare minimums \
@@ -89,8 +152,22 @@ class Order(OrderIdentifier, OrderStatus, OrderQuantity, OrderValidity):
         isin: str,
         side: TradeSide,
         quantity: int,
-        price: int
+        price: int,
+        *,
+        copy_on_write: bool = False
     ):
+        self.key_change_listener: Callable[[Order, str, object], None] = None
+        """
+        key_change_listener is set by the trader holding the order \
+        and is called with the order, attribute name and old value \
+        whenever client_id, hon or state changes. The oms_id, isin and side \
+        are not tracked and must not change while a trader holds the order.
+        """
+        self.trade_listener: Callable[[Order], None] = None
+        """
+        trade_listener is set by the trader archiving the order and is called \
+        with the order after each added trade, keeping the archived record current.
+        """
         OrderIdentifier.__init__(
             self=self,
             oms_id=oms_id,
@@ -105,24 +182,159 @@ class Order(OrderIdentifier, OrderStatus, OrderQuantity, OrderValidity):
         OrderValidity.__init__(self=self)
         self.price: int = price
         self.blocked_credit: int = None
-        self._trades: list[MicroTrade] = []
+        self.copy_on_write: bool = copy_on_write
+        self._trades: list[MicroTrade] | tuple[MicroTrade, ...] = \
+            () if copy_on_write else []
         self._trades_lock: threading.Lock = threading.Lock()
+        self._trades_read_lock = read_lock(self._trades_lock, copy_on_write)
+        self.fill: OrderFill = OrderFill()
 
     def add_trade(self, trade: MicroTrade) -> None:
-        """Add new trade to the list of order trades"""
+        """Add new trade to the list of order trades and to the fill aggregates"""
         with self._trades_lock:
-            self._trades.append(trade)
+            if self.copy_on_write:
+                self._trades = self._trades + (trade,)
+            else:
+                self._trades.append(trade)
+            self.fill = self.fill.add(trade)
+        if self.trade_listener is not None:
+            self.trade_listener(self)
+
+    def get_unfilled_quantity(self) -> int:
+        """Get the order quantity not filled by its trades"""
+        return self.quantity - self.fill.quantity
 
     def get_trades(self) -> list[MicroTrade]:
-        """Get a copy of the order's trades list"""
-        with self._trades_lock:
-            return self._trades.copy()
+        """Get a copy of the order's trades list, a snapshot tuple in copy-on-write mode"""
+        with self._trades_read_lock:
+            return self._trades if self.copy_on_write else self._trades.copy()
 
     def __str__(self) -> str:
         return f"{self.side}|{self.state}|{self.oms_id}|\
             {self.isin}|P:{self.price},Q:{self.quantity}"
 
 
+@dataclass(frozen=True, slots=True)
+class ArchivedOrder:
+    """
+    Compact and immutable record of an order that reached a terminal state, \
+    without the lock of the live order.
+    """
+    # pylint: disable=too-many-instance-attributes
+    # The record keeps every field needed for reporting the order
+    oms_id: str | int
+    isin: str
+    side: TradeSide
+    state: OrderState
+    quantity: int
+    price: int
+    client_id: str = None
+    hon: str = None
+    remaining_quantity: int = None
+    executed_quantity: int = None
+    trades: tuple[MicroTrade, ...] = ()
+    fill: OrderFill = OrderFill()
+
+    @classmethod
+    def from_order(cls, order: Order) -> "ArchivedOrder":
+        """Creates the record of an order"""
+        return cls(
+            oms_id=order.oms_id,
+            isin=order.isin,
+            side=order.side,
+            state=order.state,
+            quantity=order.quantity,
+            price=order.price,
+            client_id=order.client_id,
+            hon=order.hon,
+            remaining_quantity=order.remaining_quantity,
+            executed_quantity=order.executed_quantity,
+            trades=tuple(order.get_trades()),
+            fill=order.fill
+        )
+
+
+class _OrderIndex:
+    """
+    Orders of a trader keyed by oms_id, client_id and hon, and grouped \
+    by isin and state. The keyed dicts are always updated in place, \
+    since their single lookups are atomic. In copy-on-write mode, \
+    a changed group is replaced with an updated copy, so a change costs \
+    the size of its groups rather than of all orders and readers can \
+    iterate a group without the lock.
+    """
+
+    def __init__(self, copy_on_write: bool = False):
+        self.copy_on_write: bool = copy_on_write
+        self.by_oms_id: dict[object, Order] = {}
+        self.by_client_id: dict[str, Order] = {}
+        self.by_hon: dict[str, Order] = {}
+        self.by_isin: dict[str, dict[object, Order]] = {}
+        self.by_state: dict[OrderState, dict[object, Order]] = {}
+
+    def get_all(self) -> dict[object, Order]:
+        """
+        Get the orders by oms_id to iterate over. In copy-on-write mode \
+        it is a copy, which dict.copy makes without releasing the GIL.
+        """
+        return self.by_oms_id.copy() if self.copy_on_write else self.by_oms_id
+
+    def add(self, order: Order) -> None:
+        """Indexes an order, replacing the one with the same oms_id"""
+        current = self.by_oms_id.get(order.oms_id)
+        if current is not None:
+            self.remove(current)
+        self.by_oms_id[order.oms_id] = order
+        for name in ("client_id", "hon", "isin", "state"):
+            self.__add_key(name, getattr(order, name), order)
+
+    def remove(self, order: Order) -> None:
+        """Removes an order from the index"""
+        if self.by_oms_id.get(order.oms_id) is not order:
+            return
+        del self.by_oms_id[order.oms_id]
+        for name in ("client_id", "hon", "isin", "state"):
+            self.__remove_key(name, getattr(order, name), order)
+
+    def change_key(self, order: Order, name: str, old_value) -> None:
+        """Moves an order from the old value of an attribute to the new one"""
+        if self.by_oms_id.get(order.oms_id) is order:
+            self.__remove_key(name, old_value, order)
+            self.__add_key(name, getattr(order, name), order)
+
+    def __add_key(self, name: str, value, order: Order) -> None:
+        """Adds an order under a value of an attribute"""
+        if value is None:
+            return
+        if name in ("client_id", "hon"):
+            getattr(self, f"by_{name}")[value] = order
+            return
+        groups = getattr(self, f"by_{name}")
+        group = groups.get(value)
+        if group is None or self.copy_on_write:
+            group = groups[value] = dict(group or {})
+        group[order.oms_id] = order
+
+    def __remove_key(self, name: str, value, order: Order) -> None:
+        """Removes an order from under a value of an attribute"""
+        if value is None:
+            return
+        if name in ("client_id", "hon"):
+            keys = getattr(self, f"by_{name}")
+            if keys.get(value) is order:
+                del keys[value]
+            return
+        groups = getattr(self, f"by_{name}")
+        group = groups.get(value)
+        if group is None or order.oms_id not in group:
+            return
+        if self.copy_on_write:
+            group = groups[value] = dict(group)
+        del group[order.oms_id]
+        if not group:
+            del groups[value]
+
+
 @dataclass
 class PortfolioCash:
     """Holds the cash and credit in an account's portfolio"""
@@ -152,49 +364,201 @@ class PortfolioSecurity:
         return f"{self.quantity} of {self.isin}"
 
 
+class _Securities:
+    """
+    Securities of a portfolio keyed by ISIN. The securities are updated \
+    in place, except in copy-on-write mode, where each change publishes \
+    a new snapshot of a dict by ISIN and a tuple of the securities. \
+    Each changed security is passed to on_change, None if it is removed.
+    """
+
+    def __init__(
+            self,
+            copy_on_write: bool = False,
+            on_change: Callable[[str, PortfolioSecurity], None] = None
+    ):
+        self.copy_on_write: bool = copy_on_write
+        self.on_change: Callable[[str, PortfolioSecurity], None] = on_change
+        self.by_isin: dict[str, PortfolioSecurity] = {}
+        self.snapshot: tuple[dict[str, PortfolioSecurity],
+                             tuple[PortfolioSecurity, ...]] = ({}, ())
+
+    def get(self, isin: str) -> PortfolioSecurity:
+        """Get the security of an ISIN, None if there is none"""
+        by_isin = self.snapshot[0] if self.copy_on_write else self.by_isin
+        return by_isin.get(isin)
+
+    def get_all(self) -> list[PortfolioSecurity]:
+        """Get a copy of the securities, the snapshot tuple in copy-on-write mode"""
+        return self.snapshot[1] if self.copy_on_write \
+            else list(self.by_isin.values())
+
+    def update(
+            self,
+            securities: list[PortfolioSecurity],
+            replace: bool = False
+    ) -> None:
+        """
+        Updates or adds the securities. If replace is set, \
+        the securities that are not among them are removed.
+        """
+        by_isin = dict(self.snapshot[0]) if self.copy_on_write else self.by_isin
+        if replace:
+            isins = {x.isin for x in securities}
+            for isin in [x for x in by_isin if x not in isins]:
+                del by_isin[isin]
+                self.__notify(isin, None)
+        for security in securities:
+            current = by_isin.get(security.isin)
+            if current is not None and not self.copy_on_write:
+                current.quantity = security.quantity
+                current.position_open_price = security.position_open_price
+                current.instrument_close_price = security.instrument_close_price
+                current.instrument_last_price = security.instrument_last_price
+            else:
+                current = by_isin[security.isin] = PortfolioSecurity(
+                    isin=security.isin,
+                    quantity=security.quantity,
+                    position_open_price=security.position_open_price,
+                    instrument_close_price=security.instrument_close_price,
+                    instrument_last_price=security.instrument_last_price
+                )
+            self.__notify(security.isin, current)
+        self.__publish(by_isin)
+
+    def update_prices(
+            self,
+            isin: str,
+            last_price: int = None,
+            close_price: int = None
+    ) -> None:
+        """Updates the given prices of the security of an ISIN if exists"""
+        current = self.get(isin)
+        if current is None:
+            return
+        changes = {}
+        if last_price is not None:
+            changes["instrument_last_price"] = last_price
+        if close_price is not None:
+            changes["instrument_close_price"] = close_price
+        if self.copy_on_write:
+            current = dataclass_replace(current, **changes)
+            self.__publish({**self.snapshot[0], isin: current})
+        else:
+            for name, value in changes.items():
+                setattr(current, name, value)
+        self.__notify(isin, current)
+
+    def remove(self, isin: str) -> None:
+        """Removes the security of an ISIN if exists"""
+        by_isin = dict(self.snapshot[0]) if self.copy_on_write else self.by_isin
+        if by_isin.pop(isin, None) is not None:
+            self.__notify(isin, None)
+            self.__publish(by_isin)
+
+    def clear(self) -> None:
+        """Removes all securities"""
+        for isin in list(self.snapshot[0] if self.copy_on_write else self.by_isin):
+            self.__notify(isin, None)
+        self.by_isin.clear()
+        self.__publish({})
+
+    def __notify(self, isin: str, security: PortfolioSecurity) -> None:
+        """Passes a changed security to on_change"""
+        if self.on_change is not None:
+            self.on_change(isin, security)
+
+    def __publish(self, by_isin: dict[str, PortfolioSecurity]) -> None:
+        """Publishes the changed securities in copy-on-write mode"""
+        if self.copy_on_write:
+            self.snapshot = (by_isin, tuple(by_isin.values()))
+
+
 class Portfolio:
-    """A trader account's portfolio consisting of cash, securities, and positions"""
+    """
+    A trader account's portfolio consisting of cash, securities, and positions.
+    Securities are kept by ISIN, so lookups and updates take O(1).
+    In copy_on_write mode, writers publish new snapshots whose securities \
+    are never modified, so readers skip the locks.
+    The mark_to_market engine follows every change made through the methods \
+    of the portfolio, so get_valuation takes O(1).
+    """
+    # pylint: disable=too-many-instance-attributes
+    # Each securities collection has its own write and read locks
 
-    def __init__(self):
+    def __init__(self, copy_on_write: bool = False):
         self.cash: PortfolioCash = PortfolioCash()
+        self.copy_on_write: bool = copy_on_write
+        self.mark_to_market: MarkToMarket = MarkToMarket()
         """
-        The assets list includes instruments in which having a net short position is unallowed.
+        The assets include instruments in which having a net short position is unallowed.
         """
-        self._assets: list[PortfolioSecurity] = []
+        self._assets: _Securities = _Securities(
+            copy_on_write=copy_on_write,
+            on_change=partial(self.mark_to_market.mark, "assets")
+        )
         self._assets_lock = threading.Lock()
+        self._assets_read_lock = read_lock(self._assets_lock, copy_on_write)
         """
-        The positions list includes instruments in which \
+        The positions include instruments in which \
         having a net short position is possible, such as options and futures.
         """
-        self._positions: list[PortfolioSecurity] = []
+        self._positions: _Securities = _Securities(
+            copy_on_write=copy_on_write,
+            on_change=partial(self.mark_to_market.mark, "positions")
+        )
         self._positions_lock = threading.Lock()
+        self._positions_read_lock = read_lock(self._positions_lock, copy_on_write)
+
+    def get_valuation(self) -> PortfolioValuation:
+        """
+        Get the current totals of the assets and positions. Only changes made \
+        through update_prices and the update methods keep them current, \
+        setting the fields of a security returned by the getters does not.
+        """
+        return self.mark_to_market.valuation
+
+    def update_prices(
+            self,
+            isin: str,
+            last_price: int = None,
+            close_price: int = None
+    ) -> None:
+        """Updates the given prices of the asset and position of a security"""
+        with self._assets_lock:
+            self._assets.update_prices(isin, last_price, close_price)
+        with self._positions_lock:
+            self._positions.update_prices(isin, last_price, close_price)
 
     def has_asset(self, isin: str) -> bool:
         """Checks if portfolio has any asset of a specific security"""
-        with self._assets_lock:
-            return any(x for x in self._assets if x.isin == isin)
+        with self._assets_read_lock:
+            return self._assets.get(isin) is not None
 
     def get_asset(self, isin: str) -> PortfolioSecurity:
-        """Get asset in the portfolio from a specific security"""
-        with self._assets_lock:
-            return next((x for x in self._assets if x.isin == isin), None)
+        """
+        Get asset in the portfolio from a specific security. Outside \
+        copy_on_write mode it is the held object, so its prices should be \
+        changed through update_prices, which keeps the valuation current.
+        """
+        with self._assets_read_lock:
+            return self._assets.get(isin)
 
     def get_asset_quantity(self, isin: str) -> int:
         """Get asset quantity in the portfolio from a specific security"""
-        with self._assets_lock:
-            return next((x.quantity for x in self._assets if x.isin == isin), 0)
+        with self._assets_read_lock:
+            asset = self._assets.get(isin)
+            return asset.quantity if asset is not None else 0
 
     def get_all_assets(self) -> list[PortfolioSecurity]:
-        """Get a copy of the assets list in the portfolio"""
-        with self._assets_lock:
-            return self._assets.copy()
+        """Get a copy of the assets list, a snapshot tuple in copy-on-write mode"""
+        with self._assets_read_lock:
+            return self._assets.get_all()
 
     def remove_asset(self, isin: str) -> None:
         """Remove an asset from the portfolio"""
         with self._assets_lock:
-            asset = next((x for x in self._assets if x.isin == isin), None)
-            if asset:
-                self._assets.remove(asset)
+            self._assets.remove(isin)
 
     def empty_asset(self) -> None:
         """Remove all assets from the portfolio"""
@@ -207,54 +571,49 @@ class Portfolio:
     ) -> None:
         """Updates a specific asset in the portfolio"""
         with self._assets_lock:
-            asset = next(
-                (x for x in self._assets if x.isin == security.isin), None)
-            if asset:
-                asset.quantity = security.quantity
-                asset.position_open_price = security.position_open_price
-                asset.instrument_close_price = security.instrument_close_price
-                asset.instrument_last_price = security.instrument_last_price
-            else:
-                self._assets.append(
-                    PortfolioSecurity(
-                        isin=security.isin,
-                        quantity=security.quantity,
-                        position_open_price=security.position_open_price,
-                        instrument_close_price=security.instrument_close_price,
-                        instrument_last_price=security.instrument_last_price
-                    ))
+            self._assets.update([security])
+
+    def bulk_update_assets(
+            self,
+            securities: list[PortfolioSecurity],
+            replace: bool = False
+    ) -> None:
+        """
+        Updates many assets under a single lock acquisition. If replace is set, \
+        the securities are the whole assets and the others are removed.
+        """
+        with self._assets_lock:
+            self._assets.update(securities, replace=replace)
 
     def has_position(self, isin: str) -> bool:
         """Checks if portfolio has any position of a specific security"""
-        with self._positions_lock:
-            return any(
-                x
-                for x in self._positions
-                if x.isin == isin
-            )
+        with self._positions_read_lock:
+            return self._positions.get(isin) is not None
 
     def get_position(self, isin: str) -> PortfolioSecurity:
-        """Get position in the portfolio from a specific security"""
-        with self._positions_lock:
-            return next((x for x in self._positions if x.isin == isin), None)
+        """
+        Get position in the portfolio from a specific security. Outside \
+        copy_on_write mode it is the held object, so its prices should be \
+        changed through update_prices, which keeps the valuation current.
+        """
+        with self._positions_read_lock:
+            return self._positions.get(isin)
 
     def get_position_quantity(self, isin: str) -> int:
         """Get position quantity in the portfolio from a specific security"""
-        with self._positions_lock:
-            return next((x.quantity for x in self._positions if x.isin == isin), 0)
+        with self._positions_read_lock:
+            position = self._positions.get(isin)
+            return position.quantity if position is not None else 0
 
     def get_all_positions(self) -> list[PortfolioSecurity]:
-        """Get a copy of the positions list in the portfolio"""
-        with self._positions_lock:
-            return self._positions.copy()
+        """Get a copy of the positions list, a snapshot tuple in copy-on-write mode"""
+        with self._positions_read_lock:
+            return self._positions.get_all()
 
     def remove_position(self, isin: str) -> None:
         """Remove a position from the portfolio"""
         with self._positions_lock:
-            position = next(
-                (x for x in self._positions if x.isin == isin), None)
-            if position:
-                self._positions.remove(position)
+            self._positions.remove(isin)
 
     def empty_position(self) -> None:
         """Remove all positions from the portfolio"""
@@ -267,22 +626,19 @@ class Portfolio:
     ) -> None:
         """Updates a specific position in the portfolio"""
         with self._positions_lock:
-            position = next(
-                (x for x in self._positions if x.isin == security.isin), None)
-            if position:
-                position.quantity = security.quantity
-                position.position_open_price = security.position_open_price
-                position.instrument_close_price = security.instrument_close_price
-                position.instrument_last_price = security.instrument_last_price
-            else:
-                self._positions.append(
-                    PortfolioSecurity(
-                        isin=security.isin,
-                        quantity=security.quantity,
-                        position_open_price=security.position_open_price,
-                        instrument_close_price=security.instrument_close_price,
-                        instrument_last_price=security.instrument_last_price
-                    ))
+            self._positions.update([security])
+
+    def bulk_update_positions(
+            self,
+            securities: list[PortfolioSecurity],
+            replace: bool = False
+    ) -> None:
+        """
+        Updates many positions under a single lock acquisition. If replace is set, \
+        the securities are the whole positions and the others are removed.
+        """
+        with self._positions_lock:
+            self._positions.update(securities, replace=replace)
 
 
 @dataclass
@@ -327,16 +683,37 @@ class TraderRealtimeData:
     """
     Contains the realtime data for a single trader account.
     This data is mostly pushed through subscriptions to websockets.
+    The orders are indexed by their identifiers, isin and state. \
+    In copy_on_write mode, writers publish new copies of the changed \
+    groups of the index, so readers skip the lock, \
+    and the portfolio uses the same mode.
     """
+    # pylint: disable=too-many-instance-attributes
+    # The orders have a lock, a read lock and an archive besides the index
     portfolio: Portfolio
-    _orders: list[Order]
+    _orders: _OrderIndex
     _orders_lock: threading.Lock
+    _order_archive: OrderedDict[object, tuple[int, ArchivedOrder]]
     _subscribed_instruments: list[instrument.Instrument]
 
-    def __init__(self):
-        self.portfolio: Portfolio = Portfolio()
-        self._orders: list[Order] = []
+    def __init__(
+            self,
+            copy_on_write: bool = False,
+            order_archive_size: int = None
+    ):
+        self.copy_on_write: bool = copy_on_write
+        self.portfolio: Portfolio = Portfolio(copy_on_write=copy_on_write)
+        self._orders: _OrderIndex = _OrderIndex(copy_on_write=copy_on_write)
+        self.order_archive_size: int = order_archive_size
+        """
+        If order_archive_size is set, orders reaching a terminal state leave \
+        the orders list for an archive keeping the latest order_archive_size \
+        of them as ArchivedOrder records, each kept with the id of its order.
+        """
+        self._order_archive: OrderedDict[object, tuple[int, ArchivedOrder]] = \
+            OrderedDict()
         self._orders_lock: threading.Lock = threading.Lock()
+        self._orders_read_lock = read_lock(self._orders_lock, copy_on_write)
         self._subscribed_instruments: list[instrument.Instrument] = []
 
 
@@ -346,17 +723,26 @@ class Trader(ABC, TraderRealtimeData):
     and can be inheridated by classes specialized in training \
     using a specific OMS API.
     """
+    # pylint: disable=too-many-public-methods
+    # Order lookups have a method per index
 
     def __init__(
             self,
             credentials: TraderCredentials,
-            logger_name: str = None
+            logger_name: str = None,
+            copy_on_write: bool = False,
+            *,
+            order_archive_size: int = None
     ):
         self.credentials: TraderCredentials = credentials
         self.identification: TraderIdentification = TraderIdentification()
         self.logger: logging.Logger = logging.getLogger(logger_name)
         self.connection_state: TraderConnectionState = TraderConnectionState.NO_LOGIN
-        TraderRealtimeData.__init__(self=self)
+        TraderRealtimeData.__init__(
+            self=self,
+            copy_on_write=copy_on_write,
+            order_archive_size=order_archive_size
+        )
 
     async def __aenter__(self):
         return self
@@ -381,46 +767,164 @@ class Trader(ABC, TraderRealtimeData):
         return f"{name}@{self.credentials.api.broker_title}"
 
     def get_order(self, oms_id) -> Order:
-        """Searchs for an order in the orders list using its oms_id"""
+        """Gets an order using its oms_id"""
+        with self._orders_read_lock:
+            return self._orders.by_oms_id.get(oms_id)
+
+    def get_order_by_client_id(self, client_id: str) -> Order:
+        """Gets an order using its client_id"""
+        with self._orders_read_lock:
+            return self._orders.by_client_id.get(client_id)
+
+    def get_order_by_hon(self, hon: str) -> Order:
+        """Gets an order using its hon"""
+        with self._orders_read_lock:
+            return self._orders.by_hon.get(hon)
+
+    def get_archived_order(self, oms_id) -> ArchivedOrder:
+        """Gets the record of an archived order using its oms_id"""
+        with self._orders_lock:
+            entry = self._order_archive.get(oms_id)
+            return entry[1] if entry is not None else None
+
+    def get_archived_orders(self) -> list[ArchivedOrder]:
+        """
+        Gets the records of archived orders, oldest first. Archive reads \
+        take the lock in both modes, since archiving changes it in place.
+        """
         with self._orders_lock:
-            return next((x for x in self._orders if x.oms_id == oms_id), None)
+            return [record for _, record in self._order_archive.values()]
 
     def get_order_custom(
             self,
             filter_func: Callable[[Order], bool]
     ) -> Order:
-        """Searchs for an order in the orders list using a custom filter"""
-        with self._orders_lock:
-            return next((x for x in self._orders if filter_func(x)), None)
+        """Searchs for an order using a custom filter, run outside the lock"""
+        with self._orders_read_lock:
+            orders = list(self._orders.get_all().values())
+        return next((x for x in orders if filter_func(x)), None)
 
     def get_orders(
             self,
-            filter_func: Callable[[Order], bool] = lambda x: True
+            filter_func: Callable[[Order], bool] = None,
+            isin: str = None,
+            side: TradeSide = None,
+            state: OrderState = None
     ) -> list[Order]:
-        """Searchs for all orders complying with a filter in the orders list"""
-        with self._orders_lock:
-            return [x for x in self._orders if filter_func(x)]
+        """
+        Searchs for all orders complying with the given isin, side, state \
+        and filter. The isin and state are looked up in the indexes, \
+        so the filter is only evaluated over the orders matching them. \
+        The filter runs outside the lock, so it may change the orders.
+        """
+        with self._orders_read_lock:
+            index = self._orders
+            groups = []
+            if isin is not None:
+                groups.append(index.by_isin.get(isin, {}))
+            if state is not None:
+                groups.append(index.by_state.get(state, {}))
+            orders = min(groups, key=len) if groups else index.get_all()
+            orders = list(orders.values())
+        return [
+            x for x in orders
+            if (isin is None or x.isin == isin)
+            and (side is None or x.side == side)
+            and (state is None or x.state == state)
+            and (filter_func is None or filter_func(x))
+        ]
+
+    def get_active_orders(
+            self,
+            isin: str = None,
+            side: TradeSide = None
+    ) -> list[Order]:
+        """Gets the active orders, optionally of an isin and side"""
+        return self.get_orders(isin=isin, side=side, state=OrderState.ACTIVE)
+
+    def count_orders(
+            self,
+            isin: str = None,
+            state: OrderState = None
+    ) -> int:
+        """Counts the orders of an isin and/or state in O(1)"""
+        with self._orders_read_lock:
+            index = self._orders
+            if isin is None and state is None:
+                return len(index.by_oms_id)
+            if state is None:
+                return len(index.by_isin.get(isin, {}))
+            if isin is None:
+                return len(index.by_state.get(state, {}))
+        return len(self.get_orders(isin=isin, state=state))
 
     def remove_order(self, oms_id) -> None:
         """Removes an order from the orders list using its oms_id"""
         with self._orders_lock:
-            order = next((x for x in self._orders if x.oms_id == oms_id), None)
-            if order:
-                self._orders.remove(order)
+            order = self._orders.by_oms_id.get(oms_id)
+            if order is None:
+                return
+            self._orders.remove(order)
+            order.key_change_listener = None
 
     def empty_orders(self) -> None:
         """Removes all orders from the orders list"""
         with self._orders_lock:
-            self._orders.clear()
+            for order in self._orders.by_oms_id.values():
+                order.key_change_listener = None
+            self._orders = _OrderIndex(copy_on_write=self.copy_on_write)
+            self._order_archive.clear()
 
     def add_order(self, order: Order) -> None:
         """
         Adds a new order to the orders list.
         This method should be used by data pushers and not by the client.
         Client can use order_send to send a new order.
+        Later changes of the order's client_id, hon and state keep the indexes current, \
+        while its oms_id, isin and side must stay the same.
+        Orders in a terminal state are archived if order_archive_size is set.
         """
         with self._orders_lock:
-            self._orders.append(order)
+            current = self._orders.by_oms_id.get(order.oms_id)
+            if current is not None and current is not order:
+                current.key_change_listener = None
+            if self.__is_archivable(order):
+                self._orders.remove(current or order)
+                self.__archive(order)
+            else:
+                self._orders.add(order)
+                order.key_change_listener = self.__on_order_key_change
+
+    def __on_order_key_change(self, order: Order, name: str, old_value) -> None:
+        """Reindexes an order when an indexed attribute of it changes"""
+        with self._orders_lock:
+            self._orders.change_key(order, name, old_value)
+            if self.__is_archivable(order):
+                self._orders.remove(order)
+                order.key_change_listener = None
+                self.__archive(order)
+
+    def __is_archivable(self, order: Order) -> bool:
+        """Checks if an order should leave the orders list for the archive"""
+        return self.order_archive_size is not None and \
+            order.state is not None and order.state.is_terminal()
+
+    def __archive(self, order: Order) -> None:
+        """Archives an order, dropping the oldest archived ones beyond the size"""
+        self._order_archive.pop(order.oms_id, None)
+        self._order_archive[order.oms_id] = (id(order), ArchivedOrder.from_order(order))
+        order.trade_listener = self.__on_archived_order_trade
+        while len(self._order_archive) > self.order_archive_size:
+            self._order_archive.popitem(last=False)
+
+    def __on_archived_order_trade(self, order: Order) -> None:
+        """Updates an archived order's record in place when a trade is added to it"""
+        with self._orders_lock:
+            entry = self._order_archive.get(order.oms_id)
+            if entry is None or entry[0] != id(order):
+                order.trade_listener = None
+                return
+            self._order_archive[order.oms_id] = (id(order), ArchivedOrder.from_order(order))
 
     def get_subscribed_instrument(self, isin: str = None):
         """Gets a subscribed instrument from the subscribed instruments list"""
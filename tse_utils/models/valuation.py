@@ -0,0 +1,92 @@
+"""
+This model values trader portfolios incrementally, \
+keeping the totals current as single securities change.
+"""
+from dataclasses import dataclass
+import threading
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from tse_utils.models.trader import PortfolioSecurity
+
+
+@dataclass(frozen=True, slots=True)
+class PortfolioValuation:
+    """
+    Totals of portfolio securities marked to their last prices, \
+    or close prices if there is no last price. Unrealized P&L is against \
+    the position open prices and daily P&L against the close prices. \
+    Exposures are the absolute market values of long and short securities.
+    """
+    market_value: int = 0
+    unrealized_pnl: int = 0
+    daily_pnl: int = 0
+    long_exposure: int = 0
+    short_exposure: int = 0
+
+    def __add__(self, other: "PortfolioValuation") -> "PortfolioValuation":
+        return PortfolioValuation(
+            market_value=self.market_value + other.market_value,
+            unrealized_pnl=self.unrealized_pnl + other.unrealized_pnl,
+            daily_pnl=self.daily_pnl + other.daily_pnl,
+            long_exposure=self.long_exposure + other.long_exposure,
+            short_exposure=self.short_exposure + other.short_exposure
+        )
+
+    def __sub__(self, other: "PortfolioValuation") -> "PortfolioValuation":
+        return PortfolioValuation(
+            market_value=self.market_value - other.market_value,
+            unrealized_pnl=self.unrealized_pnl - other.unrealized_pnl,
+            daily_pnl=self.daily_pnl - other.daily_pnl,
+            long_exposure=self.long_exposure - other.long_exposure,
+            short_exposure=self.short_exposure - other.short_exposure
+        )
+
+    @classmethod
+    def of_security(cls, security: "PortfolioSecurity") -> "PortfolioValuation":
+        """Values a single security, which is zero if it has no price"""
+        quantity = security.quantity or 0
+        price = security.instrument_last_price \
+            if security.instrument_last_price is not None \
+            else security.instrument_close_price
+        if not quantity or price is None:
+            return cls()
+        market_value = quantity * price
+        return cls(
+            market_value=market_value,
+            unrealized_pnl=0 if security.position_open_price is None
+            else quantity * (price - security.position_open_price),
+            daily_pnl=0 if security.instrument_close_price is None
+            else quantity * (price - security.instrument_close_price),
+            long_exposure=max(market_value, 0),
+            short_exposure=max(-market_value, 0)
+        )
+
+
+class MarkToMarket:
+    """
+    Keeps a portfolio's valuation current by replacing the contribution \
+    of each changed security in the totals, so a change takes O(1) \
+    and reading the valuation is a single attribute read.
+    """
+
+    def __init__(self):
+        self.valuation: PortfolioValuation = PortfolioValuation()
+        self._contributions: dict[tuple[str, str], PortfolioValuation] = {}
+        self._lock: threading.Lock = threading.Lock()
+
+    def mark(self, kind: str, isin: str, security: "PortfolioSecurity") -> None:
+        """Revalues a security of a kind, assets or positions, None if removed"""
+        contribution = PortfolioValuation.of_security(security) \
+            if security is not None else PortfolioValuation()
+        with self._lock:
+            valuation = self.valuation - \
+                self._contributions.pop((kind, isin), PortfolioValuation())
+            if contribution != PortfolioValuation():
+                self._contributions[(kind, isin)] = contribution
+                valuation += contribution
+            self.valuation = valuation
+
+    def get_contribution(self, kind: str, isin: str) -> PortfolioValuation:
+        """Get the valuation of a single security of a kind"""
+        return self._contributions.get((kind, isin), PortfolioValuation())
@@ -1,3 +1,17 @@
-"""Import everything from app and models modules"""
+"""Import everything from the tsetmc modules"""
 from .app import *
 from .models import *
+from .throttling import *
+from .market_watch import *
+from .caching import *
+from .columnar import *
+from .dates import *
+from .lazy import *
+from .json_backends import *
+from .streaming import *
+from .backfill import *
+from .store import *
+from .tick_store import *
+from .adjustment import *
+from .replay import *
+from .bars import *
@@ -0,0 +1,213 @@
+"""
+This module backward adjusts daily histories for the price adjustments \
+and share changes of an instrument, using cumulative products of their \
+ratios instead of per-row loops. Requires NumPy (pip install tse_utils[numpy]).
+"""
+import asyncio
+from tse_utils.models.enums import AdjustmentMode
+from tse_utils.tsetmc.app import TsetmcScraper
+from tse_utils.tsetmc.columnar import require_numpy, CLOSING_PRICE_DAILY_FIELDS
+from tse_utils.tsetmc.store import STORED_HISTORIES
+
+ADJUSTED_PRICE_FIELDS = (
+    "previous_price",
+    "open_price",
+    "close_price",
+    "last_price",
+    "max_price",
+    "min_price"
+)
+
+
+def _as_array(rows, kind: str):
+    """Converts models into the kind's structured array, arrays pass through"""
+    numpy = require_numpy()
+    if isinstance(rows, numpy.ndarray):
+        return rows
+    history = STORED_HISTORIES[kind]
+    return numpy.array(
+        [history.to_row(x) for x in rows],
+        dtype=[(name, dtype) for name, dtype, _ in history.fields]
+    )
+
+
+def _d_even_days(d_even):
+    """Converts dEven values into days since 1970-01-01"""
+    numpy = require_numpy()
+    d_even = numpy.asarray(d_even, dtype="i8")
+    months = (d_even // 10000 - 1970) * 12 + d_even // 100 % 100 - 1
+    return months.astype("datetime64[M]").astype("datetime64[D]").astype("i8") + \
+        d_even % 100 - 1
+
+
+def _suffix_factors(event_d_even, ratios, d_even):
+    """Products of the ratios of the events after each dEven"""
+    numpy = require_numpy()
+    order = numpy.argsort(event_d_even, kind="stable")
+    suffix_products = numpy.append(numpy.cumprod(ratios[order][::-1])[::-1], 1.0)
+    return suffix_products[
+        numpy.searchsorted(event_d_even[order], d_even, side="right")
+    ]
+
+
+def match_share_changes(price_adjustments, share_changes, window_days: int = 90):
+    """
+    Matches each share change to the price adjustment of its capital change. \
+    Capital increases are registered days or months away from their price \
+    adjustment, so the match is the unmatched adjustment within window_days \
+    whose ratio is closest to numberOfShareOld / numberOfShareNew. \
+    Returns the index of the matched adjustment of each share change, \
+    -1 if none is found. Both arguments are models or columnar arrays.
+    """
+    numpy = require_numpy()
+    adjustments = _as_array(price_adjustments, "price_adjustment")
+    changes = _as_array(share_changes, "instrument_share_change")
+    adjustment_days = _d_even_days(adjustments["d_even"])
+    log_ratios = numpy.log(
+        numpy.maximum(adjustments["price_after"], 1) /
+        numpy.maximum(adjustments["price_before"], 1)
+    )
+    log_capitals = numpy.log(
+        numpy.maximum(changes["total_shares_before"], 1) /
+        numpy.maximum(changes["total_shares_after"], 1)
+    )
+    matches = numpy.full(len(changes), -1, dtype="i8")
+    matched = numpy.zeros(len(adjustments), dtype=bool)
+    order = numpy.argsort(changes["d_even"], kind="stable")
+    for index in order[
+        (changes["total_shares_before"][order] > 0) &
+        (changes["total_shares_after"][order] > 0)
+    ]:
+        distances = numpy.abs(
+            adjustment_days - _d_even_days(changes["d_even"][index])
+        )
+        candidates = numpy.flatnonzero(
+            (distances <= window_days) & ~matched & (adjustments["price_before"] > 0)
+        )
+        if candidates.size == 0:
+            continue
+        matches[index] = candidates[numpy.lexsort((
+            distances[candidates],
+            numpy.abs(log_ratios[candidates] - log_capitals[index])
+        ))[0]]
+        matched[matches[index]] = True
+    return matches
+
+
+def adjustment_factors(
+        d_even,
+        price_adjustments,
+        share_changes=None,
+        mode: AdjustmentMode = AdjustmentMode.FULL,
+        window_days: int = 90
+):
+    """
+    Computes the backward price adjustment factor of each dEven, i.e. \
+    the product of price_after / price_before over the adjustments after \
+    that day. In dividend mode, the capital part of the adjustments matched \
+    to share changes, numberOfShareOld / numberOfShareNew, is taken out and \
+    only a remaining price drop, i.e. a dividend on the same day, is kept. \
+    Adjustments and share changes are models or columnar arrays.
+    """
+    adjustments = _as_array(price_adjustments, "price_adjustment")
+    adjustments = adjustments[adjustments["price_before"] > 0]
+    ratios = adjustments["price_after"] / adjustments["price_before"]
+    if mode == AdjustmentMode.DIVIDEND:
+        if share_changes is None:
+            raise ValueError("Share changes are required in dividend mode")
+        changes = _as_array(share_changes, "instrument_share_change")
+        matches = match_share_changes(adjustments, changes, window_days)
+        for index, change in zip(matches, changes):
+            if index >= 0:
+                ratios[index] = min(1.0, ratios[index] * (
+                    change["total_shares_after"] / change["total_shares_before"]
+                ))
+    return _suffix_factors(adjustments["d_even"], ratios, d_even)
+
+
+def share_factors(
+        d_even,
+        price_adjustments,
+        share_changes,
+        window_days: int = 90
+):
+    """
+    Computes the backward share count factor of each dEven, i.e. the product \
+    of numberOfShareOld / numberOfShareNew over the share changes after \
+    that day. A share change takes effect on the day of its matched price \
+    adjustment, or on its own day if it has none. Dividends leave it as is.
+    """
+    changes = _as_array(share_changes, "instrument_share_change")
+    changes = changes[
+        (changes["total_shares_before"] > 0) & (changes["total_shares_after"] > 0)
+    ]
+    adjustments = _as_array(price_adjustments, "price_adjustment")
+    matches = match_share_changes(adjustments, changes, window_days)
+    event_d_even = changes["d_even"].copy()
+    matched = matches >= 0
+    event_d_even[matched] = adjustments["d_even"][matches[matched]]
+    return _suffix_factors(
+        event_d_even,
+        changes["total_shares_before"] / changes["total_shares_after"],
+        d_even
+    )
+
+
+def adjust_daily_history(
+        candles,
+        price_adjustments,
+        share_changes=None,
+        mode: AdjustmentMode = AdjustmentMode.FULL,
+        window_days: int = 90
+):
+    """
+    Backward adjusts a daily history, given as ClosingPriceDaily models or \
+    a columnar array. Returns a structured array, oldest first, with the \
+    columnar fields, prices multiplied by the factors, and the factors \
+    themselves in adjustment_factor. In full mode with share changes, \
+    volumes are divided by the share count factors, so dividends never \
+    change them. Without share changes or in dividend mode, volumes are kept.
+    """
+    numpy = require_numpy()
+    candles = numpy.sort(
+        _as_array(candles, "closing_price_daily"), order="d_even"
+    )
+    factors = adjustment_factors(
+        candles["d_even"], price_adjustments, share_changes, mode, window_days
+    )
+    adjusted = numpy.empty(len(candles), dtype=[
+        (name, "f8" if name in ADJUSTED_PRICE_FIELDS or name == "trade_volume"
+         else dtype)
+        for name, dtype, _ in CLOSING_PRICE_DAILY_FIELDS
+    ] + [("adjustment_factor", "f8")])
+    for name in candles.dtype.names:
+        adjusted[name] = candles[name]
+    for name in ADJUSTED_PRICE_FIELDS:
+        adjusted[name] *= factors
+    if mode == AdjustmentMode.FULL and share_changes is not None:
+        adjusted["trade_volume"] /= share_factors(
+            candles["d_even"], price_adjustments, share_changes, window_days
+        )
+    adjusted["adjustment_factor"] = factors
+    return adjusted
+
+
+async def get_adjusted_daily_history(
+        tsetmc: TsetmcScraper,
+        tsetmc_code: str,
+        mode: AdjustmentMode = AdjustmentMode.FULL,
+        timeout: int = 3,
+        window_days: int = 90
+):
+    """Fetches the histories an adjustment needs concurrently and adjusts"""
+    candles, price_adjustments, share_changes = await asyncio.gather(
+        tsetmc.get_closing_price_daily_list(
+            tsetmc_code=tsetmc_code, timeout=timeout, columnar=True),
+        tsetmc.get_price_adjustment_list(
+            tsetmc_code=tsetmc_code, timeout=timeout, columnar=True),
+        tsetmc.get_instrument_share_change(
+            tsetmc_code=tsetmc_code, timeout=timeout, columnar=True)
+    )
+    return adjust_daily_history(
+        candles, price_adjustments, share_changes, mode, window_days
+    )
@@ -2,9 +2,37 @@
 This module uses httpx to fetch data asynchronously \
 from the TSETMC website. 
 """
-from datetime import date
-import json
+from datetime import date, datetime
+from typing import TYPE_CHECKING, AsyncIterator, Awaitable, Callable
+import asyncio
+import time
 import httpx
+from tse_utils.tsetmc.throttling import RateLimiter
+from tse_utils.tsetmc.json_backends import JsonDecoder, default_json_decoder
+from tse_utils.tsetmc.dates import date_to_d_even
+from tse_utils.tsetmc.market_watch import MarketWatchSession
+from tse_utils.tsetmc.streaming import JsonArrayStreamParser
+from tse_utils.tsetmc.caching import (
+    ResponseDiskCache,
+    MemoryCache,
+    TEHRAN_TIMEZONE,
+    is_closed_day
+)
+from tse_utils.tsetmc.columnar import (
+    to_structured_array,
+    CLOSING_PRICE_DAILY_FIELDS,
+    CLIENT_TYPE_DAILY_FIELDS,
+    INDEX_DAILY_FIELDS,
+    PRICE_ADJUSTMENT_FIELDS,
+    INSTRUMENT_SHARE_CHANGE_FIELDS,
+    TRADE_INTRADAY_FIELDS,
+    BEST_LIMITS_HISTORY_FIELDS
+)
+from tse_utils.tsetmc.lazy import (
+    LazyClosingPriceInfo,
+    LazyClosingPriceDaily,
+    LazyMarketWatchTradeData
+)
 from tse_utils.tsetmc.models import (
     TsetmcScrapeException,
     InstrumentIdentification,
@@ -24,18 +52,48 @@ from tse_utils.tsetmc.models import (
     InstrumentOptionInfo,
     SecondaryMarketOverview,
     MarketWatchTradeData,
-    MarketWatchClientTypeData
+    MarketWatchClientTypeData,
+    BulkFetchItem,
+    BulkFetchStats,
+    BulkFetchResult
 )
 
+if TYPE_CHECKING:
+    import numpy
+
+
+def _percentile(sorted_values: list[float], percent: int) -> float | None:
+    """Nearest-rank percentile of an already sorted list, None if it is empty"""
+    if not sorted_values:
+        return None
+    rank = max(0, -(-len(sorted_values) * percent // 100) - 1)
+    return sorted_values[rank]
+
 
 class TsetmcScraper():
     """
     This class fetches data from tsetmc.com, the official website 
     for Tehran Stock Exchange market data.
     """
+    # pylint: disable=too-many-public-methods
+    # Each TSETMC endpoint is exposed through its own get_* method
 
-    def __init__(self, tsetmc_domain: str = "cdn.tsetmc.com"):
+    def __init__(
+            self,
+            tsetmc_domain: str = "cdn.tsetmc.com",
+            rate_limiter: RateLimiter = None,
+            response_cache: ResponseDiskCache = None,
+            memory_cache: MemoryCache = None,
+            json_decoder: JsonDecoder = None
+    ):
+        # pylint: disable=too-many-arguments
+        # Every collaborator of the scraper is optional and injected
         self.tsetmc_domain = tsetmc_domain
+        self.rate_limiter = rate_limiter
+        self.response_cache = response_cache
+        self.memory_cache = memory_cache
+        self.json_decoder = json_decoder if json_decoder \
+            else default_json_decoder()
         self.__client = httpx.AsyncClient(headers={
             "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) \
                 AppleWebKit/537.36 (KHTML, like Gecko) \
@@ -54,22 +112,136 @@ class TsetmcScraper():
     ):
         await self.__client.aclose()
 
+    async def __get(
+            self,
+            url: str,
+            endpoint: str,
+            timeout: int = 3
+    ) -> httpx.Response:
+        """Sends a paced GET request and checks the response status"""
+        if self.rate_limiter:
+            await self.rate_limiter.acquire(endpoint)
+        req = await self.__client.get(url, timeout=timeout)
+        self.__check_status(req=req, endpoint=endpoint)
+        return req
+
+    def __check_status(
+            self,
+            req: httpx.Response,
+            endpoint: str
+    ) -> None:
+        """Reports server pushback and raises on bad response statuses"""
+        if req.status_code != 200:
+            if self.rate_limiter and (
+                    req.status_code == 429 or req.status_code >= 500
+            ):
+                retry_after = req.headers.get("retry-after")
+                self.rate_limiter.report_pushback(
+                    endpoint=endpoint,
+                    retry_after=float(retry_after)
+                    if retry_after and retry_after.isdigit() else None
+                )
+            raise TsetmcScrapeException(
+                f"Bad response: [{req.status_code}]",
+                status_code=req.status_code
+            )
+
+    async def __get_json(
+            self,
+            url: str,
+            endpoint: str,
+            cache_key: str = None,
+            immutable: bool = False,
+            timeout: int = 3
+    ) -> dict:
+        """
+        Gets a raw JSON response, going through the response cache if set. \
+        Immutable responses, e.g. those of closed days, never expire.
+        """
+        # pylint: disable=too-many-arguments
+        # The cache key and immutability travel with each request
+        cacheable = self.response_cache is not None and cache_key is not None \
+            and self.response_cache.is_cacheable(endpoint, immutable)
+        if cacheable:
+            raw = self.response_cache.get(endpoint, cache_key, immutable)
+            if raw is not None:
+                return raw
+        req = await self.__get(url, endpoint=endpoint, timeout=timeout)
+        raw = self.json_decoder.decode(req.content)
+        if cacheable:
+            self.response_cache.set(endpoint, cache_key, raw, immutable)
+        return raw
+
+    async def __memoized(
+            self,
+            endpoint: str,
+            key: str,
+            fetch: Callable[[], Awaitable]
+    ):
+        """Goes through the memory cache if set, otherwise just fetches"""
+        if self.memory_cache is None:
+            return await fetch()
+        return await self.memory_cache.get_or_fetch(endpoint, key, fetch)
+
+    async def get_many(
+            self,
+            endpoint: str | Callable[..., Awaitable],
+            codes: list[str],
+            max_concurrency: int = 10,
+            **kwargs
+    ) -> BulkFetchResult:
+        """
+        Calls a single-code endpoint for many codes with bounded concurrency. \
+        The endpoint is either the name of a get_* method, e.g. "get_best_limits", \
+        or any coroutine function taking the code as its first argument. \
+        Extra keyword arguments are passed to every call. \
+        Failures are reported per code and never cancel the rest of the batch.
+        """
+        if isinstance(endpoint, str):
+            endpoint = getattr(self, endpoint)
+        semaphore = asyncio.Semaphore(max_concurrency)
+        items = [BulkFetchItem(tsetmc_code=x) for x in codes]
+
+        async def fetch(item: BulkFetchItem) -> None:
+            async with semaphore:
+                start = time.perf_counter()
+                # pylint: disable=broad-exception-caught
+                # A single failed code should not cancel the whole batch
+                try:
+                    item.result = await endpoint(item.tsetmc_code, **kwargs)
+                except Exception as ex:
+                    item.error = ex
+                item.latency = time.perf_counter() - start
+
+        start = time.perf_counter()
+        await asyncio.gather(*(fetch(x) for x in items))
+        latencies = sorted(x.latency for x in items)
+        return BulkFetchResult(
+            items=items,
+            stats=BulkFetchStats(
+                total=len(items),
+                failed=sum(1 for x in items if not x.is_successful()),
+                elapsed=time.perf_counter() - start,
+                max_concurrency=max_concurrency,
+                latency_p50=_percentile(latencies, 50),
+                latency_p90=_percentile(latencies, 90),
+                latency_p99=_percentile(latencies, 99),
+                latency_max=latencies[-1] if latencies else None
+            )
+        )
+
     async def __get_instrument_identity_raw(
             self,
             tsetmc_code: str,
             timeout: int = 3
     ) -> dict:
         """Get raw instrument identity card"""
-        req = await self.__client.get(
+        return await self.__get_json(
             f"api/Instrument/GetInstrumentIdentity/{tsetmc_code}",
+            endpoint="GetInstrumentIdentity",
+            cache_key=tsetmc_code,
             timeout=timeout
         )
-        if req.status_code != 200:
-            raise TsetmcScrapeException(
-                f"Bad response: [{req.status_code}]",
-                status_code=req.status_code
-            )
-        return json.loads(req.text)
 
     async def get_instrument_identity(
             self,
@@ -77,14 +249,16 @@ class TsetmcScraper():
             timeout: int = 3
     ) -> InstrumentIdentification:
         """Get processed instrument identity card"""
-        raw = await self.__get_instrument_identity_raw(
-            tsetmc_code=tsetmc_code,
-            timeout=timeout
-        )
-        return InstrumentIdentification(
-            tsetmc_code=tsetmc_code,
-            tsetmc_raw_data=raw["instrumentIdentity"]
-        )
+        async def fetch():
+            raw = await self.__get_instrument_identity_raw(
+                tsetmc_code=tsetmc_code,
+                timeout=timeout
+            )
+            return InstrumentIdentification(
+                tsetmc_code=tsetmc_code,
+                tsetmc_raw_data=raw["instrumentIdentity"]
+            )
+        return await self.__memoized("GetInstrumentIdentity", tsetmc_code, fetch)
 
     async def __get_instrument_search_raw(
             self,
@@ -92,16 +266,12 @@ class TsetmcScraper():
             timeout: int = 3
     ) -> dict:
         """Get raw instrument search results"""
-        req = await self.__client.get(
+        return await self.__get_json(
             f"api/Instrument/GetInstrumentSearch/{search_value}",
+            endpoint="GetInstrumentSearch",
+            cache_key=search_value,
             timeout=timeout
         )
-        if req.status_code != 200:
-            raise TsetmcScrapeException(
-                f"Bad response: [{req.status_code}]",
-                status_code=req.status_code
-            )
-        return json.loads(req.text)
 
     async def get_instrument_search(
             self,
@@ -109,11 +279,13 @@ class TsetmcScraper():
             timeout: int = 3
     ) -> list[InstrumentSearchItem]:
         """Get and process instrument search results"""
-        raw = await self.__get_instrument_search_raw(
-            search_value=search_value,
-            timeout=timeout
-        )
-        return [InstrumentSearchItem(x) for x in raw["instrumentSearch"]]
+        async def fetch():
+            raw = await self.__get_instrument_search_raw(
+                search_value=search_value,
+                timeout=timeout
+            )
+            return [InstrumentSearchItem(x) for x in raw["instrumentSearch"]]
+        return await self.__memoized("GetInstrumentSearch", search_value, fetch)
 
     async def __get_closing_price_info_raw(
             self,
@@ -121,28 +293,29 @@ class TsetmcScraper():
             timeout: int = 3
     ) -> dict:
         """Get raw instrument current trade data"""
-        req = await self.__client.get(
+        return await self.__get_json(
             f"api/ClosingPrice/GetClosingPriceInfo/{tsetmc_code}",
+            endpoint="GetClosingPriceInfo",
+            cache_key=tsetmc_code,
             timeout=timeout
         )
-        if req.status_code != 200:
-            raise TsetmcScrapeException(
-                f"Bad response: [{req.status_code}]",
-                status_code=req.status_code
-            )
-        return json.loads(req.text)
 
     async def get_closing_price_info(
             self,
             tsetmc_code: str,
-            timeout: int = 3
+            timeout: int = 3,
+            lazy: bool = False
     ) -> ClosingPriceInfo:
-        """Get and process instrument current trade data"""
+        """
+        Get and process instrument current trade data. \
+        If lazy is set, fields are decoded on their first access.
+        """
         raw = await self.__get_closing_price_info_raw(
             tsetmc_code=tsetmc_code,
             timeout=timeout
         )
-        return ClosingPriceInfo(tsetmc_raw_data=raw["closingPriceInfo"])
+        model = LazyClosingPriceInfo if lazy else ClosingPriceInfo
+        return model(tsetmc_raw_data=raw["closingPriceInfo"])
 
     async def __get_instrument_info_raw(
             self,
@@ -150,16 +323,12 @@ class TsetmcScraper():
             timeout: int = 3
     ) -> dict:
         """Get raw instrument home page data"""
-        req = await self.__client.get(
+        return await self.__get_json(
             f"api/Instrument/GetInstrumentInfo/{tsetmc_code}",
+            endpoint="GetInstrumentInfo",
+            cache_key=tsetmc_code,
             timeout=timeout
         )
-        if req.status_code != 200:
-            raise TsetmcScrapeException(
-                f"Bad response: [{req.status_code}]",
-                status_code=req.status_code
-            )
-        return json.loads(req.text)
 
     async def get_instrument_info(
             self,
@@ -167,40 +336,48 @@ class TsetmcScraper():
             timeout: int = 3
     ) -> InstrumentInfo:
         """Get and process instrument home page data"""
-        raw = await self.__get_instrument_info_raw(
-            tsetmc_code=tsetmc_code,
-            timeout=timeout
-        )
-        return InstrumentInfo(
-            tsetmc_code=tsetmc_code,
-            tsetmc_raw_data=raw["instrumentInfo"]
-        )
+        async def fetch():
+            raw = await self.__get_instrument_info_raw(
+                tsetmc_code=tsetmc_code,
+                timeout=timeout
+            )
+            return InstrumentInfo(
+                tsetmc_code=tsetmc_code,
+                tsetmc_raw_data=raw["instrumentInfo"]
+            )
+        return await self.__memoized("GetInstrumentInfo", tsetmc_code, fetch)
 
     async def __get_client_type_raw(
             self,
             tsetmc_code: str,
+            flag: int = 1,
+            count: int = 0,
             timeout: int = 3
     ) -> dict:
         """Get raw instrument current client type data"""
-        req = await self.__client.get(
-            f"api/ClientType/GetClientType/{tsetmc_code}/1/0",
+        return await self.__get_json(
+            f"api/ClientType/GetClientType/{tsetmc_code}/{flag}/{count}",
+            endpoint="GetClientType",
+            cache_key=tsetmc_code if (flag, count) == (1, 0)
+            else f"{tsetmc_code}_{flag}_{count}",
             timeout=timeout
         )
-        if req.status_code != 200:
-            raise TsetmcScrapeException(
-                f"Bad response: [{req.status_code}]",
-                status_code=req.status_code
-            )
-        return json.loads(req.text)
 
     async def get_client_type(
             self,
             tsetmc_code: str,
-            timeout: int = 3
+            timeout: int = 3,
+            flag: int = 1,
+            count: int = 0
     ) -> ClientType:
-        """Get and process instrument current client type data"""
+        """
+        Get and process instrument current client type data. \
+        flag and count are passed through as the last two path segments.
+        """
         raw = await self.__get_client_type_raw(
             tsetmc_code=tsetmc_code,
+            flag=flag,
+            count=count,
             timeout=timeout
         )
         return ClientType(tsetmc_raw_data=raw["clientType"])
@@ -211,16 +388,12 @@ class TsetmcScraper():
             timeout: int = 3
     ) -> dict:
         """Get raw instrument order book data"""
-        req = await self.__client.get(
+        return await self.__get_json(
             f"api/BestLimits/{tsetmc_code}",
+            endpoint="BestLimits",
+            cache_key=tsetmc_code,
             timeout=timeout
         )
-        if req.status_code != 200:
-            raise TsetmcScrapeException(
-                f"Bad response: [{req.status_code}]",
-                status_code=req.status_code
-            )
-        return json.loads(req.text)
 
     async def get_best_limits(
             self,
@@ -237,62 +410,150 @@ class TsetmcScraper():
     async def __get_closing_price_daily_list_raw(
             self,
             tsetmc_code: str,
+            days: int = 0,
             timeout: int = 3
     ) -> dict:
         """Get raw instrument daily historical trade data"""
-        req = await self.__client.get(
-            f"api/ClosingPrice/GetClosingPriceDailyList/{tsetmc_code}/0",
+        return await self.__get_json(
+            f"api/ClosingPrice/GetClosingPriceDailyList/{tsetmc_code}/{days}",
+            endpoint="GetClosingPriceDailyList",
+            cache_key=f"{tsetmc_code}_{days}" if days else tsetmc_code,
             timeout=timeout
         )
-        if req.status_code != 200:
-            raise TsetmcScrapeException(
-                f"Bad response: [{req.status_code}]",
-                status_code=req.status_code
-            )
-        return json.loads(req.text)
 
     async def get_closing_price_daily_list(
             self,
             tsetmc_code: str,
-            timeout: int = 3
+            timeout: int = 3,
+            columnar: bool = False,
+            lazy: bool = False,
+            days: int = 0
+    ) -> "list[ClosingPriceDaily] | numpy.ndarray":
+        """
+        Get and process instrument daily historical trade data. \
+        If days is set, only the most recent days trading days are fetched. \
+        If columnar is set, a NumPy structured array of \
+        CLOSING_PRICE_DAILY_FIELDS is returned instead. \
+        If lazy is set, fields are decoded on their first access.
+        """
+        # pylint: disable=too-many-arguments
+        # The days path parameter adds to the arguments of the history endpoint
+        raw = await self.__get_closing_price_daily_list_raw(
+            tsetmc_code=tsetmc_code,
+            days=days,
+            timeout=timeout
+        )
+        if columnar:
+            return to_structured_array(
+                raw["closingPriceDaily"], CLOSING_PRICE_DAILY_FIELDS, reverse=True
+            )
+        model = LazyClosingPriceDaily if lazy else ClosingPriceDaily
+        return [
+            model(tsetmc_raw_data=x)
+            for x in raw["closingPriceDaily"]
+        ][::-1]
+
+    async def get_closing_price_daily_tail(
+            self,
+            tsetmc_code: str,
+            last_date: date,
+            timeout: int = 3,
+            lazy: bool = False
     ) -> list[ClosingPriceDaily]:
-        """Get and process instrument daily historical trade data"""
+        """
+        Get the daily historical trade data after last_date, oldest first. \
+        There are no more trading days than calendar days since last_date, \
+        so only that many rows are requested instead of the whole history.
+        """
+        days = (datetime.now(TEHRAN_TIMEZONE).date() - last_date).days
+        if days <= 0:
+            return []
         raw = await self.__get_closing_price_daily_list_raw(
             tsetmc_code=tsetmc_code,
+            days=days,
             timeout=timeout
         )
+        last_d_even = date_to_d_even(last_date)
+        model = LazyClosingPriceDaily if lazy else ClosingPriceDaily
         return [
-            ClosingPriceDaily(tsetmc_raw_data=x)
+            model(tsetmc_raw_data=x)
             for x in raw["closingPriceDaily"]
+            if x["dEven"] > last_d_even
         ][::-1]
 
+    async def iter_closing_price_daily_list(
+            self,
+            tsetmc_code: str,
+            chunk_size: int = 500,
+            timeout: int = 3,
+            lazy: bool = False,
+            days: int = 0
+    ) -> AsyncIterator[list[ClosingPriceDaily]]:
+        """
+        Streams instrument daily historical trade data, yielding chunks \
+        of up to chunk_size rows while the response is still downloading. \
+        Rows come in the server's order, i.e. the most recent day first. \
+        If days is set, only the most recent days trading days are streamed. \
+        The response cache is not used.
+        """
+        # pylint: disable=too-many-arguments
+        # Mirrors the arguments of get_closing_price_daily_list
+        endpoint = "GetClosingPriceDailyList"
+        if self.rate_limiter:
+            await self.rate_limiter.acquire(endpoint)
+        model = LazyClosingPriceDaily if lazy else ClosingPriceDaily
+        parser = JsonArrayStreamParser(
+            key="closingPriceDaily",
+            decoder=self.json_decoder
+        )
+        async with self.__client.stream(
+            "GET",
+            f"api/ClosingPrice/GetClosingPriceDailyList/{tsetmc_code}/{days}",
+            timeout=timeout
+        ) as req:
+            self.__check_status(req=req, endpoint=endpoint)
+            rows = []
+            async for chunk in req.aiter_bytes():
+                for raw in parser.feed(chunk):
+                    rows.append(model(tsetmc_raw_data=raw))
+                    if len(rows) >= chunk_size:
+                        yield rows
+                        rows = []
+            if rows:
+                yield rows
+
     async def __get_client_type_daily_list_raw(
             self,
             tsetmc_code: str,
             timeout: int = 3
     ) -> dict:
         """Get raw instrument daily historical client type data"""
-        req = await self.__client.get(
+        return await self.__get_json(
             f"api/ClientType/GetClientTypeHistory/{tsetmc_code}",
+            endpoint="GetClientTypeHistory",
+            cache_key=tsetmc_code,
             timeout=timeout
         )
-        if req.status_code != 200:
-            raise TsetmcScrapeException(
-                f"Bad response: [{req.status_code}]",
-                status_code=req.status_code
-            )
-        return json.loads(req.text)
 
     async def get_client_type_daily_list(
             self,
             tsetmc_code: str,
-            timeout: int = 3
-    ) -> list[ClientTypeDaily]:
-        """Get and process instrument daily historical client type data"""
+            timeout: int = 3,
+            columnar: bool = False
+    ) -> "list[ClientTypeDaily] | numpy.ndarray":
+        """
+        Get and process instrument daily historical client type data. \
+        If columnar is set, a NumPy structured array of \
+        CLIENT_TYPE_DAILY_FIELDS is returned instead.
+        """
         raw = await self.__get_client_type_daily_list_raw(
             tsetmc_code=tsetmc_code,
             timeout=timeout
         )
+        if columnar:
+            return to_structured_array(
+                raw["clientType"], CLIENT_TYPE_DAILY_FIELDS, reverse=True
+            )
         return [
             ClientTypeDaily(tsetmc_raw_data=x)
             for x in raw["clientType"]
@@ -304,16 +565,12 @@ class TsetmcScraper():
             timeout: int = 3
     ) -> dict:
         """Get raw instrument intraday microtrades data"""
-        req = await self.__client.get(
+        return await self.__get_json(
             f"api/Trade/GetTrade/{tsetmc_code}",
+            endpoint="GetTrade",
+            cache_key=tsetmc_code,
             timeout=timeout
         )
-        if req.status_code != 200:
-            raise TsetmcScrapeException(
-                f"Bad response: [{req.status_code}]",
-                status_code=req.status_code
-            )
-        return json.loads(req.text)
 
     async def get_trade_intraday_list(
             self,
@@ -333,27 +590,32 @@ class TsetmcScraper():
             timeout: int = 3
     ) -> dict:
         """Get raw instrument historical price adjustments"""
-        req = await self.__client.get(
+        return await self.__get_json(
             f"api/ClosingPrice/GetPriceAdjustList/{tsetmc_code}",
+            endpoint="GetPriceAdjustList",
+            cache_key=tsetmc_code,
             timeout=timeout
         )
-        if req.status_code != 200:
-            raise TsetmcScrapeException(
-                f"Bad response: [{req.status_code}]",
-                status_code=req.status_code
-            )
-        return json.loads(req.text)
 
     async def get_price_adjustment_list(
             self,
             tsetmc_code: str,
-            timeout: int = 3
-    ) -> list[PriceAdjustment]:
-        """Get and process instrument historical price adjustments"""
+            timeout: int = 3,
+            columnar: bool = False
+    ) -> "list[PriceAdjustment] | numpy.ndarray":
+        """
+        Get and process instrument historical price adjustments. \
+        If columnar is set, a NumPy structured array of \
+        PRICE_ADJUSTMENT_FIELDS is returned instead.
+        """
         raw = await self.__get_price_adjustment_list_raw(
             tsetmc_code=tsetmc_code,
             timeout=timeout
         )
+        if columnar:
+            return to_structured_array(
+                raw["priceAdjust"], PRICE_ADJUSTMENT_FIELDS
+            )
         return [PriceAdjustment(tsetmc_raw_data=x) for x in raw["priceAdjust"]]
 
     async def __get_instrument_share_change_raw(
@@ -362,27 +624,32 @@ class TsetmcScraper():
             timeout: int = 3
     ) -> dict:
         """Get raw instrument historical share changes"""
-        req = await self.__client.get(
+        return await self.__get_json(
             f"api/Instrument/GetInstrumentShareChange/{tsetmc_code}",
+            endpoint="GetInstrumentShareChange",
+            cache_key=tsetmc_code,
             timeout=timeout
         )
-        if req.status_code != 200:
-            raise TsetmcScrapeException(
-                f"Bad response: [{req.status_code}]",
-                status_code=req.status_code
-            )
-        return json.loads(req.text)
 
     async def get_instrument_share_change(
             self,
             tsetmc_code: str,
-            timeout: int = 3
-    ) -> list[InstrumentShareChange]:
-        """Get and process instrument historical share changes"""
+            timeout: int = 3,
+            columnar: bool = False
+    ) -> "list[InstrumentShareChange] | numpy.ndarray":
+        """
+        Get and process instrument historical share changes. \
+        If columnar is set, a NumPy structured array of \
+        INSTRUMENT_SHARE_CHANGE_FIELDS is returned instead.
+        """
         raw = await self.__get_instrument_share_change_raw(
             tsetmc_code=tsetmc_code,
             timeout=timeout
         )
+        if columnar:
+            return to_structured_array(
+                raw["instrumentShareChange"], INSTRUMENT_SHARE_CHANGE_FIELDS
+            )
         return [
             InstrumentShareChange(tsetmc_raw_data=x)
             for x in raw["instrumentShareChange"]
@@ -396,33 +663,42 @@ class TsetmcScraper():
             timeout: int = 3
     ) -> dict:
         """Get raw instrument historical intraday microtrades"""
-        req = await self.__client.get(
+        return await self.__get_json(
             f"api/Trade/GetTradeHistory/{tsetmc_code}/\
                 {query_date.year}{query_date.month:02}{query_date.day:02}/\
                     {not detailed}",
+            endpoint="GetTradeHistory",
+            cache_key=f"{tsetmc_code}_{query_date:%Y%m%d}_{detailed}",
+            immutable=is_closed_day(query_date),
             timeout=timeout
         )
-        if req.status_code != 200:
-            raise TsetmcScrapeException(
-                f"Bad response: [{req.status_code}]",
-                status_code=req.status_code
-            )
-        return json.loads(req.text)
 
     async def get_trade_intraday_hisory_list(
             self,
             tsetmc_code: str,
             query_date: date,
             detailed: bool = True,
-            timeout: int = 3
-    ) -> list[TradeIntraday]:
-        """Get and process instrument historical intraday microtrades"""
+            timeout: int = 3,
+            columnar: bool = False
+    ) -> "list[TradeIntraday] | numpy.ndarray":
+        """
+        Get and process instrument historical intraday microtrades. \
+        If columnar is set, a NumPy structured array of \
+        TRADE_INTRADAY_FIELDS is returned instead.
+        """
+        # pylint: disable=too-many-arguments
+        # The columnar flag adds to the arguments of the history endpoint
         raw = await self.__get_trade_intraday_hisory_list_raw(
             tsetmc_code=tsetmc_code,
             query_date=query_date,
             detailed=detailed,
             timeout=timeout
         )
+        if columnar:
+            array = to_structured_array(
+                raw["tradeHistory"], TRADE_INTRADAY_FIELDS
+            )
+            return array[array.argsort(order="index", kind="stable")]
         proc = [
             TradeIntraday(tsetmc_raw_data=x)
             for x in raw["tradeHistory"]
@@ -437,30 +713,36 @@ class TsetmcScraper():
             timeout: int = 3
     ) -> dict:
         """Get raw instrument historical intraday order book"""
-        req = await self.__client.get(
+        return await self.__get_json(
             f"api/BestLimits/{tsetmc_code}/{query_date.year}\
 {query_date.month:02}{query_date.day:02}",
+            endpoint="BestLimitsHistory",
+            cache_key=f"{tsetmc_code}_{query_date:%Y%m%d}",
+            immutable=is_closed_day(query_date),
             timeout=timeout
         )
-        if req.status_code != 200:
-            raise TsetmcScrapeException(
-                f"Bad response: [{req.status_code}]",
-                status_code=req.status_code
-            )
-        return json.loads(req.text)
 
     async def get_best_limits_intraday_history_list(
             self,
             tsetmc_code: str,
             query_date: date,
-            timeout: int = 3
-    ) -> list[BestLimitsHistoryRow]:
-        """Get and process instrument historical intraday order book"""
+            timeout: int = 3,
+            columnar: bool = False
+    ) -> "list[BestLimitsHistoryRow] | numpy.ndarray":
+        """
+        Get and process instrument historical intraday order book. \
+        If columnar is set, a NumPy structured array of \
+        BEST_LIMITS_HISTORY_FIELDS is returned instead.
+        """
         raw = await self.__get_best_limits_intraday_history_list_raw(
             tsetmc_code=tsetmc_code,
             query_date=query_date,
             timeout=timeout
         )
+        if columnar:
+            return to_structured_array(
+                raw["bestLimitsHistory"], BEST_LIMITS_HISTORY_FIELDS
+            )
         return [
             BestLimitsHistoryRow(tsetmc_raw_data=x)
             for x in raw["bestLimitsHistory"]
@@ -472,27 +754,32 @@ class TsetmcScraper():
             timeout: int = 3
     ) -> dict:
         """Get raw index history"""
-        req = await self.__client.get(
+        return await self.__get_json(
             f"api/Index/GetIndexB2History/{tsetmc_code}",
+            endpoint="GetIndexB2History",
+            cache_key=tsetmc_code,
             timeout=timeout
         )
-        if req.status_code != 200:
-            raise TsetmcScrapeException(
-                f"Bad response: [{req.status_code}]",
-                status_code=req.status_code
-            )
-        return json.loads(req.text)
 
     async def get_index_history(
             self,
             tsetmc_code: str,
-            timeout: int = 3
-    ) -> list[IndexDaily]:
-        """Get and process index history"""
+            timeout: int = 3,
+            columnar: bool = False
+    ) -> "list[IndexDaily] | numpy.ndarray":
+        """
+        Get and process index history. \
+        If columnar is set, a NumPy structured array of \
+        INDEX_DAILY_FIELDS is returned instead.
+        """
         raw = await self.__get_index_history_raw(
             tsetmc_code=tsetmc_code,
             timeout=timeout
         )
+        if columnar:
+            return to_structured_array(
+                raw["indexB2"], INDEX_DAILY_FIELDS
+            )
         return [IndexDaily(tsetmc_raw_data=x) for x in raw["indexB2"]]
 
     async def __get_instrument_option_info_raw(
@@ -501,16 +788,12 @@ class TsetmcScraper():
             timeout: int = 3
     ) -> dict:
         """Get raw instrument option info"""
-        req = await self.__client.get(
+        return await self.__get_json(
             f"api/Instrument/GetInstrumentOptionByInstrumentID/{isin}",
+            endpoint="GetInstrumentOptionByInstrumentID",
+            cache_key=isin,
             timeout=timeout
         )
-        if req.status_code != 200:
-            raise TsetmcScrapeException(
-                f"Bad response: [{req.status_code}]",
-                status_code=req.status_code
-            )
-        return json.loads(req.text)
 
     async def get_instrument_option_info(
             self,
@@ -518,27 +801,26 @@ class TsetmcScraper():
             timeout: int = 3
     ) -> InstrumentOptionInfo:
         """Get and process instrument option info"""
-        raw = await self.__get_instrument_option_info_raw(
-            isin=isin,
-            timeout=timeout
+        async def fetch():
+            raw = await self.__get_instrument_option_info_raw(
+                isin=isin,
+                timeout=timeout
+            )
+            return InstrumentOptionInfo(tsetmc_raw_data=raw["instrumentOption"])
+        return await self.__memoized(
+            "GetInstrumentOptionByInstrumentID", isin, fetch
         )
-        return InstrumentOptionInfo(tsetmc_raw_data=raw["instrumentOption"])
 
     async def __get_primary_market_overview_raw(
             self,
             timeout: int = 3
     ) -> dict:
         """Get raw primary market overview"""
-        req = await self.__client.get(
+        return await self.__get_json(
             "api/MarketData/GetMarketOverview/1",
+            endpoint="GetMarketOverview",
             timeout=timeout
         )
-        if req.status_code != 200:
-            raise TsetmcScrapeException(
-                f"Bad response: [{req.status_code}]",
-                status_code=req.status_code
-            )
-        return json.loads(req.text)
 
     async def get_primary_market_overview(
             self,
@@ -557,16 +839,11 @@ class TsetmcScraper():
             timeout: int = 3
     ) -> dict:
         """Get raw secondary market overview"""
-        req = await self.__client.get(
+        return await self.__get_json(
             "api/MarketData/GetMarketOverview/2",
+            endpoint="GetMarketOverview",
             timeout=timeout
         )
-        if req.status_code != 200:
-            raise TsetmcScrapeException(
-                f"Bad response: [{req.status_code}]",
-                status_code=req.status_code
-            )
-        return json.loads(req.text)
 
     async def get_secondary_market_overview(
             self,
@@ -587,52 +864,59 @@ class TsetmcScraper():
             timeout: int = 3
     ) -> dict:
         """Get raw market watch page"""
-        req = await self.__client.get(
+        return await self.__get_json(
             f"api/ClosingPrice/GetMarketWatch?market=0&paperTypes[0]=1&paperTypes[1]=2\
                 &paperTypes[2]=3&paperTypes[3]=4&paperTypes[4]=5&paperTypes[5]=6\
                     &paperTypes[6]=7&paperTypes[7]=8&paperTypes[8]=9&showTraded=false\
                         &withBestLimits=true&hEven={h_even}&RefID={ref_id}",
+            endpoint="GetMarketWatch",
             timeout=timeout
         )
-        if req.status_code != 200:
-            raise TsetmcScrapeException(
-                f"Bad response: [{req.status_code}]",
-                status_code=req.status_code
-            )
-        return json.loads(req.text)
 
     async def get_market_watch(
             self,
             ref_id: int = 0,
             h_even: int = 0,
-            timeout: int = 3
+            timeout: int = 3,
+            lazy: bool = False
     ) -> list[MarketWatchTradeData]:
-        """Get and process market watch page"""
+        """
+        Get and process market watch page. \
+        If lazy is set, fields are decoded on their first access.
+        """
         raw = await self.__get_market_watch_raw(
             ref_id=ref_id,
             h_even=h_even,
             timeout=timeout
         )
+        model = LazyMarketWatchTradeData if lazy else MarketWatchTradeData
         return [
-            MarketWatchTradeData(tsetmc_raw_data=x)
+            model(tsetmc_raw_data=x)
             for x in raw["marketwatch"]
         ]
 
+    def market_watch_session(
+            self,
+            timeout: int = 3,
+            lazy: bool = False
+    ) -> MarketWatchSession:
+        """Creates a stateful market watch that fetches only the deltas"""
+        return MarketWatchSession(
+            fetch_raw=self.__get_market_watch_raw,
+            timeout=timeout,
+            lazy=lazy
+        )
+
     async def __get_client_type_all_raw(
             self,
             timeout: int = 3
     ) -> dict:
         """Get raw market client type"""
-        req = await self.__client.get(
+        return await self.__get_json(
             "api/ClientType/GetClientTypeAll",
+            endpoint="GetClientTypeAll",
             timeout=timeout
         )
-        if req.status_code != 200:
-            raise TsetmcScrapeException(
-                f"Bad response: [{req.status_code}]",
-                status_code=req.status_code
-            )
-        return json.loads(req.text)
 
     async def get_client_type_all(
             self,
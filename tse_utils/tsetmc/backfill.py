@@ -0,0 +1,234 @@
+"""
+This module backfills per-date history endpoints for many instruments, \
+checkpointing every completed unit so that an interrupted run resumes \
+where it stopped instead of starting over.
+"""
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from inspect import isawaitable
+from typing import Callable
+import asyncio
+import json
+import os
+import time
+from tse_utils.tsetmc.app import TsetmcScraper
+from tse_utils.tsetmc.caching import TEHRAN_TIMEZONE, is_closed_day
+
+
+@dataclass(frozen=True)
+class BackfillUnit:
+    """A single request of a backfill: one endpoint, instrument and date"""
+    tsetmc_code: str
+    query_date: date
+    endpoint: str
+
+    def to_raw(self) -> dict:
+        """Converts the unit into its manifest record"""
+        return {
+            "code": self.tsetmc_code,
+            "date": self.query_date.isoformat(),
+            "endpoint": self.endpoint
+        }
+
+    @classmethod
+    def from_raw(cls, raw: dict) -> "BackfillUnit":
+        """Builds the unit from its manifest record"""
+        return cls(
+            tsetmc_code=raw["code"],
+            query_date=date.fromisoformat(raw["date"]),
+            endpoint=raw["endpoint"]
+        )
+
+
+class BackfillManifest:
+    """
+    Append-only JSONL file of the completed units of a backfill. \
+    A line cut short by a crash is ignored on load.
+    """
+
+    def __init__(self, path: str):
+        self.path: str = path
+        self._done: set[BackfillUnit] = set()
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as file:
+                for line in file:
+                    try:
+                        self._done.add(BackfillUnit.from_raw(json.loads(line)))
+                    except (ValueError, KeyError):
+                        continue
+
+    def __contains__(self, unit: BackfillUnit) -> bool:
+        return unit in self._done
+
+    def __len__(self) -> int:
+        return len(self._done)
+
+    def mark_done(self, unit: BackfillUnit) -> None:
+        """Records a completed unit and flushes it to the disk"""
+        with open(self.path, "a", encoding="utf-8") as file:
+            file.write(json.dumps(unit.to_raw()) + "\n")
+        self._done.add(unit)
+
+
+@dataclass
+class BackfillProgress:
+    """Progress of a backfill run"""
+    total: int = 0
+    done: int = 0
+    resumed: int = 0
+    failed: int = 0
+    elapsed: float = 0.0
+    failures: dict[BackfillUnit, Exception] = field(default_factory=dict)
+
+    def remaining(self) -> int:
+        """Units that are neither completed nor failed yet"""
+        return self.total - self.resumed - self.done - self.failed
+
+    def units_per_second(self) -> float:
+        """Units completed per second in this run"""
+        return self.done / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self):
+        return f"{self.done + self.resumed}/{self.total} units, \
+{self.failed} failed, {self.units_per_second():.1f} units/s"
+
+
+class BackfillPipeline:
+    """
+    Fetches every (instrument, trading day, endpoint) unit of a date range \
+    with bounded concurrency. Trading days are taken from each instrument's \
+    daily history, completed units are checkpointed to the manifest and \
+    skipped on later runs. The results are handed to on_result, which may be \
+    a plain or a coroutine function; a unit is checkpointed once it returns.
+    """
+    # pylint: disable=too-many-instance-attributes
+    # Mostly configuration set once in the constructor
+    default_endpoints: tuple[str] = (
+        "get_trade_intraday_hisory_list",
+        "get_best_limits_intraday_history_list"
+    )
+
+    def __init__(
+            self,
+            tsetmc: TsetmcScraper,
+            manifest: BackfillManifest | str,
+            endpoints: tuple[str] = None,
+            max_concurrency: int = 10,
+            *,
+            on_result: Callable[[BackfillUnit, object], object] = None,
+            on_progress: Callable[[BackfillProgress], None] = None,
+            timeout: int = 3
+    ):
+        # pylint: disable=too-many-arguments
+        # The pipeline is configured once through its constructor
+        self.tsetmc: TsetmcScraper = tsetmc
+        self.manifest: BackfillManifest = manifest \
+            if isinstance(manifest, BackfillManifest) else BackfillManifest(manifest)
+        self.endpoints: tuple[str] = endpoints if endpoints \
+            else self.default_endpoints
+        self.max_concurrency: int = max_concurrency
+        self.on_result = on_result
+        self.on_progress = on_progress
+        self.timeout: int = timeout
+        self.plan_failures: dict[str, Exception] = {}
+
+    async def trading_days(
+            self,
+            tsetmc_code: str,
+            start: date,
+            end: date
+    ) -> list[date]:
+        """
+        Get the closed days of the range on which the instrument was traded. \
+        Today is left out while its session may still be open, since \
+        its units would be checkpointed with partial data.
+        """
+        days = (datetime.now(TEHRAN_TIMEZONE).date() - start).days + 1
+        history = await self.tsetmc.get_closing_price_daily_list(
+            tsetmc_code=tsetmc_code,
+            timeout=self.timeout,
+            days=max(days, 1)
+        )
+        return [
+            x.last_trade_datetime.date() for x in history
+            if x.trade_num and start <= x.last_trade_datetime.date() <= end
+            and is_closed_day(x.last_trade_datetime.date())
+        ]
+
+    async def plan(
+            self,
+            codes: list[str],
+            start: date,
+            end: date
+    ) -> list[BackfillUnit]:
+        """
+        Lists the units of the backfill. Instruments whose daily history \
+        could not be fetched are left out and recorded in plan_failures.
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def code_units(tsetmc_code: str) -> list[BackfillUnit]:
+            async with semaphore:
+                # pylint: disable=broad-exception-caught
+                # A single failed instrument should not cancel the backfill
+                try:
+                    days = await self.trading_days(tsetmc_code, start, end)
+                except Exception as ex:
+                    self.plan_failures[tsetmc_code] = ex
+                    return []
+            return [
+                BackfillUnit(
+                    tsetmc_code=tsetmc_code,
+                    query_date=day,
+                    endpoint=endpoint
+                )
+                for day in days for endpoint in self.endpoints
+            ]
+
+        plans = await asyncio.gather(*(code_units(x) for x in codes))
+        return [unit for units in plans for unit in units]
+
+    async def run(
+            self,
+            codes: list[str],
+            start: date,
+            end: date
+    ) -> BackfillProgress:
+        """Runs the backfill, skipping the units already in the manifest"""
+        began = time.perf_counter()
+        units = await self.plan(codes, start, end)
+        progress = BackfillProgress(total=len(units))
+        queue = asyncio.Queue()
+        for unit in units:
+            if unit in self.manifest:
+                progress.resumed += 1
+            else:
+                queue.put_nowait(unit)
+
+        async def worker() -> None:
+            while not queue.empty():
+                unit = queue.get_nowait()
+                # pylint: disable=broad-exception-caught
+                # Failed units stay out of the manifest and are retried on rerun
+                try:
+                    result = await getattr(self.tsetmc, unit.endpoint)(
+                        tsetmc_code=unit.tsetmc_code,
+                        query_date=unit.query_date,
+                        timeout=self.timeout
+                    )
+                    if self.on_result:
+                        handled = self.on_result(unit, result)
+                        if isawaitable(handled):
+                            await handled
+                    self.manifest.mark_done(unit)
+                    progress.done += 1
+                except Exception as ex:
+                    progress.failures[unit] = ex
+                    progress.failed += 1
+                progress.elapsed = time.perf_counter() - began
+                if self.on_progress:
+                    self.on_progress(progress)
+
+        await asyncio.gather(*(worker() for _ in range(self.max_concurrency)))
+        progress.elapsed = time.perf_counter() - began
+        return progress
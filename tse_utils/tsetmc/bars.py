@@ -0,0 +1,150 @@
+"""
+This module aggregates intraday trades into OHLCV bars of several \
+resolutions at once, either incrementally on live trades or in \
+vectorized form on a whole day. Canceled trades are skipped.
+"""
+from datetime import date, datetime, time
+from tse_utils.models import realtime
+from tse_utils.tsetmc.columnar import require_numpy, TRADE_INTRADAY_FIELDS
+from tse_utils.tsetmc.dates import time_to_h_even
+from tse_utils.tsetmc.models import TradeIntraday
+
+BAR_FIELDS = (
+    ("h_even", "i4"),
+    ("open_price", "i8"),
+    ("max_price", "i8"),
+    ("min_price", "i8"),
+    ("close_price", "i8"),
+    ("trade_num", "i8"),
+    ("trade_volume", "i8"),
+    ("trade_value", "i8"),
+)
+
+
+def _bucket_time(seconds: int) -> time:
+    """Converts seconds since midnight into a time"""
+    return time(hour=seconds // 3600, minute=seconds // 60 % 60, second=seconds % 60)
+
+
+class BarAggregator:
+    """
+    Builds bars of each resolution, given in seconds, from trades arriving \
+    in order. Every trade updates the open bars in O(1) per resolution, \
+    and a bar is emitted once a trade falls after its interval. \
+    The open_trade_datetime of a bar is the start of its interval and \
+    its previous_price is the close of the bar before it.
+    """
+
+    def __init__(
+            self,
+            trading_date: date,
+            resolutions: tuple[int] = (1, 60, 300)
+    ):
+        self.trading_date: date = trading_date
+        self.resolutions: tuple[int] = tuple(resolutions)
+        self._bars: dict[int, realtime.TradeCandle] = {}
+        self._buckets: dict[int, int] = {}
+        self._previous_prices: dict[int, int] = {}
+
+    def current(self, resolution: int) -> realtime.TradeCandle:
+        """Get the open bar of a resolution, None if there is none"""
+        return self._bars.get(resolution)
+
+    def add(self, trade: TradeIntraday) -> list[tuple[int, realtime.TradeCandle]]:
+        """Adds a trade and returns the (resolution, bar) pairs it completed"""
+        if trade.is_canceled:
+            return []
+        seconds = trade.time.hour * 3600 + trade.time.minute * 60 + \
+            trade.time.second
+        trade_datetime = datetime.combine(self.trading_date, trade.time)
+        completed = []
+        for resolution in self.resolutions:
+            bucket = seconds // resolution
+            candle = self._bars.get(resolution)
+            if candle is not None and bucket != self._buckets[resolution]:
+                completed.append((resolution, candle))
+                self._previous_prices[resolution] = candle.close_price
+                candle = None
+            if candle is None:
+                candle = realtime.TradeCandle(
+                    previous_price=self._previous_prices.get(resolution),
+                    open_price=trade.price,
+                    max_price=trade.price,
+                    min_price=trade.price,
+                    trade_num=0,
+                    trade_volume=0,
+                    trade_value=0,
+                    open_trade_datetime=datetime.combine(
+                        self.trading_date, _bucket_time(bucket * resolution)
+                    )
+                )
+                self._bars[resolution] = candle
+                self._buckets[resolution] = bucket
+            candle.max_price = max(candle.max_price, trade.price)
+            candle.min_price = min(candle.min_price, trade.price)
+            candle.close_price = candle.last_price = trade.price
+            candle.trade_num += 1
+            candle.trade_volume += trade.volume
+            candle.trade_value += trade.price * trade.volume
+            candle.last_trade_datetime = trade_datetime
+        return completed
+
+    def add_many(
+            self,
+            trades: list[TradeIntraday]
+    ) -> list[tuple[int, realtime.TradeCandle]]:
+        """Adds trades in order and returns the bars they completed"""
+        completed = []
+        for trade in trades:
+            completed += self.add(trade)
+        return completed
+
+    def flush(self) -> list[tuple[int, realtime.TradeCandle]]:
+        """Completes and returns the open bars, e.g. at the end of the session"""
+        completed = list(self._bars.items())
+        for resolution, candle in completed:
+            self._previous_prices[resolution] = candle.close_price
+        self._bars.clear()
+        self._buckets.clear()
+        return completed
+
+
+def aggregate_bars(trades, resolutions: tuple[int] = (1, 60, 300)) -> dict:
+    """
+    Aggregates a whole day of trades, given as TradeIntraday models or \
+    a columnar array, into a structured array of BAR_FIELDS per resolution. \
+    Bars are keyed by the hEven of the start of their interval.
+    """
+    numpy = require_numpy()
+    if not isinstance(trades, numpy.ndarray):
+        trades = numpy.array([
+            (time_to_h_even(x.time), x.index, x.price, x.volume, x.is_canceled)
+            for x in trades
+        ], dtype=[(name, dtype) for name, dtype, _ in TRADE_INTRADAY_FIELDS])
+    trades = trades[trades["is_canceled"] == 0]
+    trades = trades[trades.argsort(order="index", kind="stable")]
+    h_even = trades["h_even"].astype("i8")
+    seconds = h_even // 10000 * 3600 + h_even // 100 % 100 * 60 + h_even % 100
+    prices = trades["price"].astype("i8")
+    volumes = trades["volume"].astype("i8")
+    values = prices * volumes
+    if trades.size == 0:
+        return {x: numpy.empty(0, dtype=list(BAR_FIELDS)) for x in resolutions}
+    bars = {}
+    for resolution in resolutions:
+        buckets = seconds // resolution
+        starts = numpy.flatnonzero(numpy.diff(buckets, prepend=buckets[0] - 1))
+        ends = numpy.append(starts[1:], len(buckets)) - 1
+        bar_seconds = buckets[starts] * resolution
+        array = numpy.empty(len(starts), dtype=list(BAR_FIELDS))
+        array["h_even"] = bar_seconds // 3600 * 10000 + \
+            bar_seconds // 60 % 60 * 100 + bar_seconds % 60
+        array["open_price"] = prices[starts]
+        array["close_price"] = prices[ends]
+        array["max_price"] = numpy.maximum.reduceat(prices, starts)
+        array["min_price"] = numpy.minimum.reduceat(prices, starts)
+        array["trade_volume"] = numpy.add.reduceat(volumes, starts)
+        array["trade_value"] = numpy.add.reduceat(values, starts)
+        array["trade_num"] = ends - starts + 1
+        bars[resolution] = array
+    return bars
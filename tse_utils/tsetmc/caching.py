@@ -0,0 +1,204 @@
+"""
+This module holds the caches used by TsetmcScraper \
+for avoiding repeated downloads of the same data.
+"""
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import Awaitable, Callable
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+
+TEHRAN_TIMEZONE = timezone(timedelta(hours=3, minutes=30))
+SAFE_CACHE_KEY = re.compile(r"[A-Za-z0-9_\-][A-Za-z0-9_.\-]{0,127}")
+
+
+def is_closed_day(query_date: date) -> bool:
+    """Checks if a trading day is over in Tehran, so its data never changes"""
+    return query_date < datetime.now(TEHRAN_TIMEZONE).date()
+
+
+def is_empty_response(raw) -> bool:
+    """Checks if a raw response carries no data, e.g. {"tradeHistory": []}"""
+    if isinstance(raw, dict):
+        return all(x in (None, "", [], {}) for x in raw.values())
+    return raw in (None, "", [], {})
+
+
+class ResponseDiskCache:
+    """
+    Persistent cache of raw TSETMC responses, stored as one JSON file \
+    per endpoint and key. Responses of closed days are kept forever, \
+    while endpoints listed in ttls expire after the given number of seconds.
+    """
+
+    def __init__(
+            self,
+            directory: str,
+            ttls: dict[str, float] = None
+    ):
+        self.directory: str = directory
+        self.ttls: dict[str, float] = ttls if ttls else {}
+
+    def __path(self, endpoint: str, key: str) -> str:
+        """
+        Keys that are safe file names are used as they are, others, \
+        e.g. free-text search values, are replaced with their hash.
+        """
+        key = str(key)
+        if not SAFE_CACHE_KEY.fullmatch(key):
+            key = "~" + hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, endpoint, f"{key}.json")
+
+    def is_cacheable(self, endpoint: str, immutable: bool = False) -> bool:
+        """Checks if responses of an endpoint should be stored"""
+        return immutable or endpoint in self.ttls
+
+    def get(
+            self,
+            endpoint: str,
+            key: str,
+            immutable: bool = False
+    ) -> dict:
+        """Returns the cached raw response or None if missing or expired"""
+        if not self.is_cacheable(endpoint, immutable):
+            return None
+        path = self.__path(endpoint, key)
+        try:
+            if not immutable and \
+                    time.time() - os.path.getmtime(path) > self.ttls[endpoint]:
+                return None
+            with open(path, "r", encoding="utf-8") as file:
+                return json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def set(
+            self,
+            endpoint: str,
+            key: str,
+            raw: dict,
+            immutable: bool = False
+    ) -> None:
+        """
+        Stores a raw response, replacing the old file atomically. \
+        Empty immutable responses are not stored, since closed days \
+        may be published late and would otherwise stay empty forever.
+        """
+        if immutable and is_empty_response(raw):
+            return
+        path = self.__path(endpoint, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump(raw, file, ensure_ascii=False)
+        os.replace(temp_path, path)
+
+    def clear(self, endpoint: str = None) -> None:
+        """Removes the cached responses of an endpoint or all endpoints"""
+        endpoints = [endpoint] if endpoint else (
+            os.listdir(self.directory) if os.path.isdir(self.directory) else []
+        )
+        for name in endpoints:
+            endpoint_directory = os.path.join(self.directory, name)
+            if not os.path.isdir(endpoint_directory):
+                continue
+            for file_name in os.listdir(endpoint_directory):
+                os.remove(os.path.join(endpoint_directory, file_name))
+
+
+@dataclass
+class CacheStats:
+    """Counters of a memory cache"""
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    coalesced: int = 0
+    """
+    coalesced counts the callers that joined an already in-flight request.
+    """
+
+
+class MemoryCache:
+    """
+    Bounded in-memory cache of processed results with per-endpoint TTLs \
+    and least recently used eviction. Concurrent callers asking for the same \
+    key share a single in-flight request. Cached objects are shared between \
+    callers and should be treated as read-only.
+    """
+    default_ttls: dict[str, float] = {
+        "GetInstrumentIdentity": 86400,
+        "GetInstrumentInfo": 60,
+        "GetInstrumentSearch": 3600,
+        "GetInstrumentOptionByInstrumentID": 86400
+    }
+
+    def __init__(
+            self,
+            max_size: int = 4096,
+            ttls: dict[str, float] = None,
+            default_ttl: float = 60
+    ):
+        self.max_size: int = max_size
+        self.ttls: dict[str, float] = {**self.default_ttls, **(ttls or {})}
+        self.default_ttl: float = default_ttl
+        self.stats: CacheStats = CacheStats()
+        self._entries: OrderedDict[tuple[str, str], tuple[float, object]] = \
+            OrderedDict()
+        self._in_flight: dict[tuple[str, str], asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        """Removes all cached entries"""
+        self._entries.clear()
+
+    def __lookup(self, entry_key: tuple[str, str]):
+        entry = self._entries.get(entry_key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del self._entries[entry_key]
+            return None
+        self._entries.move_to_end(entry_key)
+        return entry
+
+    def __store(self, entry_key: tuple[str, str], value: object) -> None:
+        ttl = self.ttls.get(entry_key[0], self.default_ttl)
+        self._entries[entry_key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(entry_key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    async def get_or_fetch(
+            self,
+            endpoint: str,
+            key: str,
+            fetch: Callable[[], Awaitable]
+    ) -> object:
+        """Returns the cached value of a key or fetches it once for all callers"""
+        entry_key = (endpoint, key)
+        entry = self.__lookup(entry_key)
+        if entry is not None:
+            self.stats.hits += 1
+            return entry[1]
+        in_flight = self._in_flight.get(entry_key)
+        if in_flight is not None:
+            self.stats.coalesced += 1
+            return await asyncio.shield(in_flight)
+        self.stats.misses += 1
+        in_flight = asyncio.ensure_future(fetch())
+        self._in_flight[entry_key] = in_flight
+        try:
+            value = await asyncio.shield(in_flight)
+        finally:
+            if self._in_flight.get(entry_key) is in_flight:
+                del self._in_flight[entry_key]
+        self.__store(entry_key, value)
+        return value
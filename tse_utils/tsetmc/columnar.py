@@ -0,0 +1,106 @@
+"""
+This module converts TSETMC history lists into NumPy structured arrays, \
+one contiguous record per row instead of one Python object per row. \
+NumPy is an optional dependency: pip install tse_utils[numpy]
+"""
+from operator import itemgetter
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+
+def require_numpy():
+    """Returns the numpy module or raises if it is not installed"""
+    if np is None:
+        raise ImportError(
+            "numpy is required for columnar mode, install it using: \
+pip install tse_utils[numpy]"
+        )
+    return np
+
+
+CLOSING_PRICE_DAILY_FIELDS = (
+    ("d_even", "i4", "dEven"),
+    ("h_even", "i4", "hEven"),
+    ("previous_price", "i8", "priceYesterday"),
+    ("open_price", "i8", "priceFirst"),
+    ("close_price", "i8", "pClosing"),
+    ("last_price", "i8", "pDrCotVal"),
+    ("max_price", "i8", "priceMax"),
+    ("min_price", "i8", "priceMin"),
+    ("trade_num", "i8", "zTotTran"),
+    ("trade_value", "i8", "qTotCap"),
+    ("trade_volume", "i8", "qTotTran5J"),
+)
+
+CLIENT_TYPE_DAILY_FIELDS = (
+    ("d_even", "i4", "recDate"),
+    ("legal_buy_num", "i8", "buy_N_Count"),
+    ("legal_buy_volume", "i8", "buy_N_Volume"),
+    ("legal_buy_value", "i8", "buy_N_Value"),
+    ("legal_sell_num", "i8", "sell_N_Count"),
+    ("legal_sell_volume", "i8", "sell_N_Volume"),
+    ("legal_sell_value", "i8", "sell_N_Value"),
+    ("natural_buy_num", "i8", "buy_I_Count"),
+    ("natural_buy_volume", "i8", "buy_I_Volume"),
+    ("natural_buy_value", "i8", "buy_I_Value"),
+    ("natural_sell_num", "i8", "sell_I_Count"),
+    ("natural_sell_volume", "i8", "sell_I_Volume"),
+    ("natural_sell_value", "i8", "sell_I_Value"),
+)
+
+INDEX_DAILY_FIELDS = (
+    ("d_even", "i4", "dEven"),
+    ("min_value", "f8", "xNivInuPbMresIbs"),
+    ("max_value", "f8", "xNivInuPhMresIbs"),
+    ("close_value", "f8", "xNivInuClMresIbs"),
+)
+
+PRICE_ADJUSTMENT_FIELDS = (
+    ("d_even", "i4", "dEven"),
+    ("price_before", "i8", "pClosingNotAdjusted"),
+    ("price_after", "i8", "pClosing"),
+)
+
+INSTRUMENT_SHARE_CHANGE_FIELDS = (
+    ("d_even", "i4", "dEven"),
+    ("total_shares_before", "i8", "numberOfShareOld"),
+    ("total_shares_after", "i8", "numberOfShareNew"),
+)
+
+TRADE_INTRADAY_FIELDS = (
+    ("h_even", "i4", "hEven"),
+    ("index", "i4", "nTran"),
+    ("price", "i8", "pTran"),
+    ("volume", "i8", "qTitTran"),
+    ("is_canceled", "i1", "canceled"),
+)
+
+BEST_LIMITS_HISTORY_FIELDS = (
+    ("h_even", "i4", "hEven"),
+    ("reference_id", "i8", "refID"),
+    ("row_number", "i4", "number"),
+    ("demand_num", "i4", "zOrdMeDem"),
+    ("demand_volume", "i8", "qTitMeDem"),
+    ("demand_price", "i8", "pMeDem"),
+    ("supply_num", "i4", "zOrdMeOf"),
+    ("supply_volume", "i8", "qTitMeOf"),
+    ("supply_price", "i8", "pMeOf"),
+)
+
+
+def to_structured_array(
+        tsetmc_raw_data: list[dict],
+        fields: tuple[tuple[str, str, str], ...],
+        reverse: bool = False
+):
+    """
+    Converts raw TSETMC rows into a structured array. \
+    Each field is a (column name, NumPy type, raw key) tuple.
+    """
+    numpy = require_numpy()
+    dtype = numpy.dtype([(name, kind) for name, kind, _ in fields])
+    getter = itemgetter(*(key for _, _, key in fields))
+    rows = reversed(tsetmc_raw_data) if reverse else tsetmc_raw_data
+    return numpy.array([getter(x) for x in rows], dtype=dtype)
@@ -0,0 +1,68 @@
+"""
+This module decodes TSETMC dEven (yyyymmdd) and hEven (hhmmss) integers. \
+The scalar functions memoize the small domain of values seen in practice, \
+while the batch functions convert whole columns using NumPy.
+"""
+from datetime import date, datetime, time
+from functools import lru_cache
+from tse_utils.tsetmc.columnar import require_numpy
+
+
+@lru_cache(maxsize=32768)
+def d_even_to_date(d_even: int) -> date:
+    """Converts a dEven integer, e.g. 20230430, into a date"""
+    return date(
+        year=d_even // 10000,
+        month=d_even // 100 % 100,
+        day=d_even % 100
+    )
+
+
+@lru_cache(maxsize=86400)
+def h_even_to_time(h_even: int) -> time:
+    """Converts a hEven integer, e.g. 122606, into a time"""
+    return time(
+        hour=h_even // 10000,
+        minute=h_even // 100 % 100,
+        second=h_even % 100
+    )
+
+
+def even_to_datetime(d_even: int, h_even: int) -> datetime:
+    """Converts a pair of dEven and hEven integers into a datetime"""
+    return datetime.combine(d_even_to_date(d_even), h_even_to_time(h_even))
+
+
+def date_to_d_even(value: date) -> int:
+    """Converts a date into a dEven integer"""
+    return value.year * 10000 + value.month * 100 + value.day
+
+
+def time_to_h_even(value: time) -> int:
+    """Converts a time into a hEven integer"""
+    return value.hour * 10000 + value.minute * 100 + value.second
+
+
+def d_even_to_datetime64(d_even):
+    """Converts an array of dEven integers into datetime64[D]"""
+    numpy = require_numpy()
+    d_even = numpy.asarray(d_even, dtype="i8")
+    years = d_even // 10000 - 1970
+    months = d_even // 100 % 100 - 1
+    days = d_even % 100 - 1
+    month_starts = (years * 12 + months).astype("datetime64[M]")
+    return month_starts.astype("datetime64[D]") + days.astype("timedelta64[D]")
+
+
+def h_even_to_timedelta64(h_even):
+    """Converts an array of hEven integers into timedelta64[s] since midnight"""
+    numpy = require_numpy()
+    h_even = numpy.asarray(h_even, dtype="i8")
+    seconds = h_even // 10000 * 3600 + h_even // 100 % 100 * 60 + h_even % 100
+    return seconds.astype("timedelta64[s]")
+
+
+def even_to_datetime64(d_even, h_even):
+    """Converts arrays of dEven and hEven integers into datetime64[s]"""
+    return d_even_to_datetime64(d_even).astype("datetime64[s]") + \
+        h_even_to_timedelta64(h_even)
@@ -0,0 +1,49 @@
+"""
+This module holds the pluggable JSON decoders used for parsing \
+TSETMC responses directly from their bytes. orjson is used when \
+installed (pip install tse_utils[orjson]), with the stdlib as fallback.
+"""
+from abc import ABC, abstractmethod
+import json
+
+
+class JsonDecoder(ABC):
+    """Interface for decoding JSON documents from bytes"""
+    # pylint: disable=too-few-public-methods
+    name: str = None
+
+    @abstractmethod
+    def decode(self, content: bytes):
+        """Decodes a JSON document from its UTF-8 encoded bytes"""
+
+
+class StdlibJsonDecoder(JsonDecoder):
+    """Decodes using the json module of the standard library"""
+    # pylint: disable=too-few-public-methods
+    name = "json"
+
+    def decode(self, content: bytes):
+        return json.loads(content)
+
+
+class OrjsonDecoder(JsonDecoder):
+    """Decodes using orjson, which is considerably faster on large payloads"""
+    # pylint: disable=too-few-public-methods
+    name = "orjson"
+
+    def __init__(self):
+        # pylint: disable=import-outside-toplevel, no-member
+        # orjson is an optional dependency
+        import orjson
+        self.__loads = orjson.loads
+
+    def decode(self, content: bytes):
+        return self.__loads(content)
+
+
+def default_json_decoder() -> JsonDecoder:
+    """Returns the fastest available JSON decoder"""
+    try:
+        return OrjsonDecoder()
+    except ImportError:
+        return StdlibJsonDecoder()
@@ -0,0 +1,114 @@
+"""
+This module holds lazy variants of the tsetmc models. \
+They wrap the raw TSETMC dict and decode each field on its first access, \
+so consumers reading only a few fields skip the cost of the rest.
+"""
+from functools import cached_property
+from typing import Callable
+from tse_utils.models import realtime, instrument
+from tse_utils.tsetmc.dates import even_to_datetime, h_even_to_time
+from tse_utils.tsetmc.models import (
+    ClosingPriceInfo,
+    ClosingPriceDaily,
+    MarketWatchBestLimits,
+    MarketWatchTradeData
+)
+from tse_utils.models.enums import Nsc
+
+
+def lazy_field(decode: Callable[[dict], object]) -> cached_property:
+    """Builds a field that is decoded from tsetmc_raw_data on first access"""
+    return cached_property(lambda self: decode(self.tsetmc_raw_data))
+
+
+def raw_int(key: str) -> cached_property:
+    """Builds a lazy field holding the integer value of a raw key"""
+    return lazy_field(lambda x: int(x[key]))
+
+
+def raw_value(key: str) -> cached_property:
+    """Builds a lazy field holding the value of a raw key as is"""
+    return lazy_field(lambda x: x[key])
+
+
+# pylint: disable=super-init-not-called, too-few-public-methods
+# Lazy models only keep the raw data and decode the fields on demand
+
+
+class LazyClosingPriceInfo(ClosingPriceInfo):
+    """ClosingPriceInfo that decodes its fields on first access"""
+
+    def __init__(self, tsetmc_raw_data: dict):
+        self.tsetmc_raw_data = tsetmc_raw_data
+
+    nsc = lazy_field(lambda x: Nsc[
+        str(x["instrumentState"]["cEtaval"]).replace(" ", "")
+    ])
+    previous_price = raw_value("priceYesterday")
+    open_price = raw_value("priceFirst")
+    last_price = raw_value("pDrCotVal")
+    close_price = raw_value("pClosing")
+    max_price = raw_value("priceMax")
+    min_price = raw_value("priceMin")
+    trade_num = raw_value("zTotTran")
+    trade_value = raw_value("qTotCap")
+    trade_volume = raw_value("qTotTran5J")
+    last_trade_datetime = lazy_field(
+        lambda x: even_to_datetime(x["finalLastDate"], x["hEven"])
+    )
+
+
+class LazyClosingPriceDaily(ClosingPriceDaily):
+    """ClosingPriceDaily that decodes its fields on first access"""
+
+    def __init__(self, tsetmc_raw_data: dict):
+        self.tsetmc_raw_data = tsetmc_raw_data
+
+    previous_price = raw_value("priceYesterday")
+    open_price = raw_value("priceFirst")
+    last_price = raw_value("pDrCotVal")
+    close_price = raw_value("pClosing")
+    max_price = raw_value("priceMax")
+    min_price = raw_value("priceMin")
+    trade_num = raw_value("zTotTran")
+    trade_value = raw_value("qTotCap")
+    trade_volume = raw_value("qTotTran5J")
+    last_trade_datetime = lazy_field(
+        lambda x: even_to_datetime(x["dEven"], x["hEven"])
+    )
+
+
+class LazyMarketWatchTradeData(MarketWatchTradeData):
+    """MarketWatchTradeData that decodes its fields on first access"""
+
+    def __init__(self, tsetmc_raw_data: dict):
+        self.tsetmc_raw_data = tsetmc_raw_data
+
+    total_shares = raw_int("ztd")
+    base_volume = raw_int("bv")
+    eps = raw_value("eps")
+    price_thresholds = lazy_field(lambda x: realtime.PriceRange(
+        max_price=int(x["pMax"]),
+        min_price=int(x["pMin"])
+    ))
+    identification = lazy_field(lambda x: instrument.InstrumentIdentification(
+        tsetmc_code=x["insCode"],
+        ticker=x["lva"],
+        isin=x["insID"],
+        name_persian=x["lvc"]
+    ))
+    intraday_trade_candle = lazy_field(lambda x: realtime.TradeCandle(
+        previous_price=int(x["py"]),
+        last_price=int(x["pdv"]),
+        open_price=int(x["pf"]),
+        close_price=int(x["pcl"]),
+        max_price=int(x["pmx"]),
+        min_price=int(x["pmn"]),
+        trade_value=int(x["qtc"]),
+        trade_volume=int(x["qtj"]),
+        trade_num=int(x["ztt"])
+    ))
+    last_trade_time = lazy_field(lambda x: h_even_to_time(x["hEven"]))
+    orderbook = lazy_field(
+        lambda x: MarketWatchBestLimits(tsetmc_raw_data=x["blDs"])
+    )
@@ -0,0 +1,105 @@
+"""
+This module keeps the market watch state between polls, \
+so that only the deltas are fetched and processed.
+"""
+from typing import AsyncIterator, Awaitable, Callable
+import asyncio
+from tse_utils.tsetmc.models import MarketWatchTradeData
+from tse_utils.tsetmc.lazy import LazyMarketWatchTradeData
+
+
+def merge_best_limits(previous: list[dict], rows: list[dict]) -> list[dict]:
+    """
+    Merges the best limits rows of a delta into the previous rows by their \
+    number, since a delta carries only the changed levels. Rows without \
+    a number replace the previous ones as a whole.
+    """
+    if not previous or any("number" not in x for x in rows + previous):
+        return rows
+    merged = {x["number"]: x for x in previous}
+    for row in rows:
+        merged[row["number"]] = {**merged.get(row["number"], {}), **row}
+    return [merged[x] for x in sorted(merged)]
+
+
+class MarketWatchSession:
+    """
+    Stateful market watch that remembers the last RefID and hEven, \
+    asks TSETMC only for the deltas and merges them into an in-memory \
+    table keyed by insCode. Use TsetmcScraper.market_watch_session to create one.
+    """
+
+    def __init__(
+            self,
+            fetch_raw: Callable[..., Awaitable[dict]],
+            timeout: int = 3,
+            lazy: bool = False
+    ):
+        self.ref_id: int = 0
+        self.h_even: int = 0
+        self.timeout: int = timeout
+        self._model = LazyMarketWatchTradeData if lazy else MarketWatchTradeData
+        self._fetch_raw = fetch_raw
+        self._raw_table: dict[str, dict] = {}
+        self._table: dict[str, MarketWatchTradeData] = {}
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+    def get(self, tsetmc_code: str) -> MarketWatchTradeData:
+        """Get the latest known market watch data of an instrument"""
+        return self._table.get(tsetmc_code)
+
+    def get_all(self) -> list[MarketWatchTradeData]:
+        """Get the latest known market watch data of all instruments"""
+        return list(self._table.values())
+
+    def reset(self) -> None:
+        """Forgets the state, so that the next poll fetches the whole market"""
+        self.ref_id = 0
+        self.h_even = 0
+        self._raw_table.clear()
+        self._table.clear()
+
+    async def poll(self) -> list[MarketWatchTradeData]:
+        """
+        Fetches the deltas since the last poll, merges them into the table \
+        and returns the instruments that actually changed.
+        """
+        raw = await self._fetch_raw(
+            ref_id=self.ref_id,
+            h_even=self.h_even,
+            timeout=self.timeout
+        )
+        changed = []
+        for item in raw["marketwatch"]:
+            tsetmc_code = item["insCode"]
+            previous = self._raw_table.get(tsetmc_code)
+            merged = item if previous is None else {**previous, **item}
+            if previous is not None and "blDs" in item:
+                merged["blDs"] = merge_best_limits(
+                    previous.get("blDs", []), item["blDs"]
+                )
+            self.h_even = max(self.h_even, item.get("hEven", 0))
+            self.ref_id = max(
+                self.ref_id,
+                max((x.get("rid", 0) for x in item.get("blDs", ())), default=0)
+            )
+            if merged == previous:
+                continue
+            self._raw_table[tsetmc_code] = merged
+            data = self._model(tsetmc_raw_data=merged)
+            self._table[tsetmc_code] = data
+            changed.append(data)
+        return changed
+
+    async def watch(
+            self,
+            interval: float = 1.0
+    ) -> AsyncIterator[list[MarketWatchTradeData]]:
+        """Polls forever and yields the changed instruments of each poll"""
+        while True:
+            changed = await self.poll()
+            if changed:
+                yield changed
+            await asyncio.sleep(interval)
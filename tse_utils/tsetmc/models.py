@@ -5,6 +5,11 @@ inherited from default models.
 from dataclasses import dataclass
 from datetime import datetime, date, time
 from tse_utils.models.enums import Nsc
+from tse_utils.tsetmc.dates import (
+    d_even_to_date,
+    h_even_to_time,
+    even_to_datetime
+)
 from tse_utils.models import realtime, instrument
 
 
@@ -76,11 +81,9 @@ class ClosingPriceInfo(realtime.TradeCandle):
                 tsetmc_raw_data["instrumentState"]["cEtaval"]
             ).replace(" ", "")
         ]
-        ltd_date = tsetmc_raw_data["finalLastDate"]
-        ltd_time = tsetmc_raw_data["hEven"]
-        last_trade_datetime = datetime(
-            year=ltd_date // 10000, month=ltd_date // 100 % 100, day=ltd_date % 100,
-            hour=ltd_time // 10000, minute=ltd_time // 100 % 100, second=ltd_time % 100
+        last_trade_datetime = even_to_datetime(
+            tsetmc_raw_data["finalLastDate"],
+            tsetmc_raw_data["hEven"]
         )
         realtime.TradeCandle.__init__(
             self=self,
@@ -165,7 +168,7 @@ class ClientType(realtime.ClientType):
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class BestLimitsRow(realtime.OrderBookRow):
     """A single row from an instrument's order book"""
 
@@ -201,11 +204,9 @@ class ClosingPriceDaily(realtime.TradeCandle):
     """Holds historical data of an instrument's trades for a single day"""
 
     def __init__(self, tsetmc_raw_data):
-        ltd_date = tsetmc_raw_data["dEven"]
-        ltd_time = tsetmc_raw_data["hEven"]
-        last_trade_datetime = datetime(
-            year=ltd_date // 10000, month=ltd_date // 100 % 100, day=ltd_date % 100,
-            hour=ltd_time // 10000, minute=ltd_time // 100 % 100, second=ltd_time % 100
+        last_trade_datetime = even_to_datetime(
+            tsetmc_raw_data["dEven"],
+            tsetmc_raw_data["hEven"]
         )
         realtime.TradeCandle.__init__(
             self=self,
@@ -255,15 +256,10 @@ class ClientTypeDaily(realtime.ClientType):
                 )
             )
         )
-        rd_date = tsetmc_raw_data["recDate"]
-        self.record_date = date(
-            year=rd_date // 10000,
-            month=rd_date // 100 % 100,
-            day=rd_date % 100
-        )
+        self.record_date = d_even_to_date(tsetmc_raw_data["recDate"])
 
 
-@dataclass
+@dataclass(slots=True)
 class TradeIntraday:
     """Intraday micro trade"""
     price: int = None
@@ -276,12 +272,7 @@ class TradeIntraday:
         self.price = tsetmc_raw_data["pTran"]
         self.volume = tsetmc_raw_data["qTitTran"]
         self.index = tsetmc_raw_data["nTran"]
-        h_even = tsetmc_raw_data["hEven"]
-        self.time = time(
-            hour=h_even // 10000,
-            minute=h_even // 100 % 100,
-            second=h_even % 100
-        )
+        self.time = h_even_to_time(tsetmc_raw_data["hEven"])
         self.is_canceled = bool(tsetmc_raw_data["canceled"])
 
 
@@ -298,12 +289,7 @@ class PriceAdjustment:
     def __init__(self, tsetmc_raw_data):
         self.price_before = tsetmc_raw_data["pClosingNotAdjusted"]
         self.price_after = tsetmc_raw_data["pClosing"]
-        d_even = tsetmc_raw_data["dEven"]
-        self.date = date(
-            year=d_even // 10000,
-            month=d_even // 100 % 100,
-            day=d_even % 100
-        )
+        self.date = d_even_to_date(tsetmc_raw_data["dEven"])
 
 
 @dataclass
@@ -316,15 +302,10 @@ class InstrumentShareChange:
     def __init__(self, tsetmc_raw_data):
         self.total_shares_before = tsetmc_raw_data["numberOfShareOld"]
         self.total_shares_after = tsetmc_raw_data["numberOfShareNew"]
-        d_even = tsetmc_raw_data["dEven"]
-        self.record_date = date(
-            year=d_even // 10000,
-            month=d_even // 100 % 100,
-            day=d_even % 100
-        )
+        self.record_date = d_even_to_date(tsetmc_raw_data["dEven"])
 
 
-@dataclass
+@dataclass(slots=True)
 class BestLimitsHistoryRow(BestLimitsRow):
     """Holds a single row of best limits from an instrument's history"""
     row_number: int = None
@@ -334,10 +315,7 @@ class BestLimitsHistoryRow(BestLimitsRow):
     def __init__(self, tsetmc_raw_data, *args):
         self.row_number = tsetmc_raw_data["number"]
         self.reference_id = tsetmc_raw_data["refID"]
-        h_even = tsetmc_raw_data["hEven"]
-        self.record_time = time(
-            hour=h_even // 10000, minute=h_even // 100 % 100, second=h_even % 100
-        )
+        self.record_time = h_even_to_time(tsetmc_raw_data["hEven"])
         BestLimitsRow.__init__(
             self=self,
             tsetmc_raw_data=tsetmc_raw_data,
@@ -357,12 +335,7 @@ class IndexDaily:
         self.min_value = tsetmc_raw_data["xNivInuPbMresIbs"]
         self.max_value = tsetmc_raw_data["xNivInuPhMresIbs"]
         self.close_value = tsetmc_raw_data["xNivInuClMresIbs"]
-        d_even = tsetmc_raw_data["dEven"]
-        self.record_date = date(
-            year=d_even // 10000,
-            month=d_even // 100 % 100,
-            day=d_even % 100
-        )
+        self.record_date = d_even_to_date(tsetmc_raw_data["dEven"])
 
 
 @dataclass
@@ -378,12 +351,7 @@ class InstrumentOptionInfo(
     underlying_tsetmc_code: str = None
 
     def __init__(self, tsetmc_raw_data):
-        end_date = tsetmc_raw_data["endDate"]
-        exercise_date = date(
-            year=end_date // 10000,
-            month=end_date // 100 % 100,
-            day=end_date % 100
-        )
+        exercise_date = d_even_to_date(tsetmc_raw_data["endDate"])
         instrument.ExerciseParams.__init__(
             self=self,
             exercise_price=tsetmc_raw_data["strikePrice"],
@@ -397,12 +365,7 @@ class InstrumentOptionInfo(
         )
         self.tsetmc_code = tsetmc_raw_data["insCode"]
         self.open_positions = tsetmc_raw_data["buyOP"]
-        begin_date = tsetmc_raw_data["beginDate"]
-        self.begin_date = date(
-            year=begin_date // 10000,
-            month=begin_date // 100 % 100,
-            day=begin_date % 100
-        )
+        self.begin_date = d_even_to_date(tsetmc_raw_data["beginDate"])
         self.lot_size = tsetmc_raw_data["contractSize"]
         self.underlying_tsetmc_code = tsetmc_raw_data["uaInsCode"]
 
@@ -441,12 +404,9 @@ class PrimaryMarketOverview(realtime.TradeQuantity):
             close_value=tsetmc_raw_data["indexEqualWeightedLastValue"],
             change=tsetmc_raw_data["indexEqualWeightedChange"]
         )
-        market_activity_deven = tsetmc_raw_data["marketActivityDEven"]
-        market_activity_heven = tsetmc_raw_data["marketActivityHEven"]
-        self.record_datetime = datetime(
-            year=market_activity_deven // 10000, month=market_activity_deven // 100 % 100,
-            day=market_activity_deven % 100, hour=market_activity_heven // 10000,
-            minute=market_activity_heven // 100 % 100, second=market_activity_heven % 100
+        self.record_datetime = even_to_datetime(
+            tsetmc_raw_data["marketActivityDEven"],
+            tsetmc_raw_data["marketActivityHEven"]
         )
         self.market_state = tsetmc_raw_data["marketState"]
         self.market_state_title = tsetmc_raw_data["marketStateTitle"]
@@ -476,12 +436,9 @@ class SecondaryMarketOverview(realtime.TradeQuantity):
             close_value=tsetmc_raw_data["indexLastValue"],
             change=tsetmc_raw_data["indexChange"]
         )
-        market_activity_deven = tsetmc_raw_data["marketActivityDEven"]
-        market_activity_heven = tsetmc_raw_data["marketActivityHEven"]
-        self.datetime = datetime(
-            year=market_activity_deven // 10000, month=market_activity_deven // 100 % 100,
-            day=market_activity_deven % 100, hour=market_activity_heven // 10000,
-            minute=market_activity_heven // 100 % 100, second=market_activity_heven % 100
+        self.datetime = even_to_datetime(
+            tsetmc_raw_data["marketActivityDEven"],
+            tsetmc_raw_data["marketActivityHEven"]
         )
         self.market_state = tsetmc_raw_data["marketState"]
         self.market_state_title = tsetmc_raw_data["marketStateTitle"]
@@ -489,7 +446,7 @@ class SecondaryMarketOverview(realtime.TradeQuantity):
         self.tertiary_market_value = tsetmc_raw_data["marketValueBase"]
 
 
-@dataclass
+@dataclass(slots=True)
 class MarketWatchBestLimitsRow(realtime.OrderBookRow):
     """Order book row from market watch"""
     row_id: int = None
@@ -560,12 +517,7 @@ class MarketWatchTradeData(
             trade_num=int(tsetmc_raw_data["ztt"])
         )
         self.eps = tsetmc_raw_data["eps"]
-        h_even = tsetmc_raw_data["hEven"]
-        self.last_trade_time = time(
-            hour=h_even//10000,
-            minute=h_even//100 % 100,
-            second=h_even % 100
-        )
+        self.last_trade_time = h_even_to_time(tsetmc_raw_data["hEven"])
         self.orderbook = MarketWatchBestLimits(
             tsetmc_raw_data=tsetmc_raw_data["blDs"]
         )
@@ -584,6 +536,58 @@ class MarketWatchClientTypeData(ClientType):
         )
 
 
+@dataclass
+class BulkFetchItem:
+    """Outcome of a single code within a bulk fetch"""
+    tsetmc_code: str
+    result: object = None
+    error: Exception = None
+    latency: float = None
+
+    def is_successful(self) -> bool:
+        """Checks if the fetch for this code has been successful"""
+        return self.error is None
+
+
+@dataclass
+class BulkFetchStats:
+    """Throughput and latency figures of a single bulk fetch run"""
+    # pylint: disable=too-many-instance-attributes
+    # Latency percentiles are kept as separate fields for readability
+    total: int = 0
+    failed: int = 0
+    elapsed: float = 0.0
+    max_concurrency: int = None
+    latency_p50: float = None
+    latency_p90: float = None
+    latency_p99: float = None
+    latency_max: float = None
+
+    def throughput(self) -> float:
+        """Returns the number of finished requests per second"""
+        return self.total / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self) -> str:
+        return f"{self.total - self.failed}/{self.total} ok in {self.elapsed:.2f}s \
+({self.throughput():.1f} req/s, concurrency={self.max_concurrency}) | \
+p50={self.latency_p50}s p90={self.latency_p90}s p99={self.latency_p99}s"
+
+
+@dataclass
+class BulkFetchResult:
+    """Holds per code outcomes of a bulk fetch, in the order of input codes"""
+    items: list[BulkFetchItem]
+    stats: BulkFetchStats
+
+    def successes(self) -> dict[str, object]:
+        """Returns the results of successful fetches mapped by their codes"""
+        return {x.tsetmc_code: x.result for x in self.items if x.is_successful()}
+
+    def failures(self) -> dict[str, Exception]:
+        """Returns the errors of failed fetches mapped by their codes"""
+        return {x.tsetmc_code: x.error for x in self.items if not x.is_successful()}
+
+
 class TsetmcScrapeException(Exception):
     """Tsetmc bad response status error"""
 
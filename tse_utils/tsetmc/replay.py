@@ -0,0 +1,87 @@
+"""
+This module replays an instrument's intraday order book from its \
+best limits history, using a (time, reference id) index built once.
+"""
+from bisect import bisect_right
+from datetime import time
+from itertools import groupby
+from math import inf
+from typing import Iterator
+from tse_utils.models import realtime
+from tse_utils.tsetmc.models import BestLimitsHistoryRow
+
+
+class OrderBookReplay:
+    """
+    Each best limits history record replaces a single row of the book. \
+    Records are indexed per row by (record_time, reference_id), so the book \
+    at any moment is found with one binary search per row, and snapshots \
+    are iterated forward by applying the records in order.
+    """
+
+    def __init__(self, rows: list[BestLimitsHistoryRow], row_count: int = 5):
+        self.row_count: int = max(
+            [row_count] + [x.row_number for x in rows]
+        )
+        self._records: list[BestLimitsHistoryRow] = sorted(rows, key=self.key)
+        self._keys: list[tuple[time, int]] = [
+            self.key(x) for x in self._records
+        ]
+        self._row_keys: list[list[tuple[time, int]]] = [
+            [] for _ in range(self.row_count)
+        ]
+        self._row_records: list[list[BestLimitsHistoryRow]] = [
+            [] for _ in range(self.row_count)
+        ]
+        for record in self._records:
+            self._row_keys[record.row_number - 1].append(self.key(record))
+            self._row_records[record.row_number - 1].append(record)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    @staticmethod
+    def key(row: BestLimitsHistoryRow) -> tuple[time, int]:
+        """The replay order of a record"""
+        return row.record_time, row.reference_id
+
+    def __book(self, rows: list[realtime.OrderBookRow]) -> realtime.OrderBook:
+        """Wraps rows in an order book, filling the missing ones with empty rows"""
+        book = realtime.OrderBook(row_count=0)
+        book.rows = [x if x else realtime.OrderBookRow() for x in rows]
+        return book
+
+    def book_at(self, at: time, reference_id: int = None) -> realtime.OrderBook:
+        """
+        Get the order book after the records up to a time, \
+        or up to a reference id within that time if it is given.
+        """
+        key = (at, inf if reference_id is None else reference_id)
+        rows = []
+        for keys, records in zip(self._row_keys, self._row_records):
+            index = bisect_right(keys, key)
+            rows.append(records[index - 1] if index else None)
+        return self.__book(rows)
+
+    def snapshots(
+            self,
+            start: time = None,
+            end: time = None
+    ) -> Iterator[tuple[time, int, realtime.OrderBook]]:
+        """
+        Iterates over the books after each (record_time, reference_id) \
+        change between two times, along with the time and reference id.
+        """
+        first = 0
+        rows = [None] * self.row_count
+        if start is not None:
+            first = bisect_right(self._keys, (start, -inf))
+            if first:
+                previous = self._keys[first - 1]
+                rows = self.book_at(*previous).rows
+        for key, records in groupby(self._records[first:], key=self.key):
+            if end is not None and key[0] > end:
+                break
+            for record in records:
+                rows[record.row_number - 1] = record
+            yield key[0], key[1], self.__book(rows)
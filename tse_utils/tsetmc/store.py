@@ -0,0 +1,239 @@
+"""
+This module keeps daily histories in a local SQLite database, \
+so that they are read from the disk and only new days are fetched.
+"""
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Awaitable, Callable
+import sqlite3
+from tse_utils.tsetmc.app import TsetmcScraper
+from tse_utils.tsetmc.dates import (
+    d_even_to_date,
+    date_to_d_even,
+    time_to_h_even
+)
+from tse_utils.tsetmc.columnar import (
+    to_structured_array,
+    CLOSING_PRICE_DAILY_FIELDS,
+    CLIENT_TYPE_DAILY_FIELDS,
+    INDEX_DAILY_FIELDS,
+    PRICE_ADJUSTMENT_FIELDS,
+    INSTRUMENT_SHARE_CHANGE_FIELDS
+)
+from tse_utils.tsetmc.models import (
+    ClosingPriceDaily,
+    ClientTypeDaily,
+    IndexDaily,
+    PriceAdjustment,
+    InstrumentShareChange
+)
+
+
+@dataclass(frozen=True)
+class StoredHistory:
+    """
+    Describes how a daily history is stored: its table, its columns \
+    (the columnar fields, keyed by d_even), how a model becomes a row \
+    and how new rows are fetched given the last stored date, if any.
+    """
+    table: str
+    model: type
+    fields: tuple
+    to_row: Callable[[object], tuple]
+    fetch: Callable[[TsetmcScraper, str, date], Awaitable[list]]
+
+
+def _client_type_row(x: ClientTypeDaily) -> tuple:
+    return (
+        date_to_d_even(x.record_date),
+        x.legal.buy.num, x.legal.buy.volume, x.legal.buy.value,
+        x.legal.sell.num, x.legal.sell.volume, x.legal.sell.value,
+        x.natural.buy.num, x.natural.buy.volume, x.natural.buy.value,
+        x.natural.sell.num, x.natural.sell.volume, x.natural.sell.value
+    )
+
+
+STORED_HISTORIES: dict[str, StoredHistory] = {x.table: x for x in (
+    StoredHistory(
+        table="closing_price_daily",
+        model=ClosingPriceDaily,
+        fields=CLOSING_PRICE_DAILY_FIELDS,
+        to_row=lambda x: (
+            date_to_d_even(x.last_trade_datetime.date()),
+            time_to_h_even(x.last_trade_datetime.time()),
+            x.previous_price, x.open_price, x.close_price, x.last_price,
+            x.max_price, x.min_price, x.trade_num, x.trade_value, x.trade_volume
+        ),
+        fetch=lambda tsetmc, code, last_date: tsetmc.get_closing_price_daily_tail(
+            tsetmc_code=code, last_date=last_date
+        ) if last_date else tsetmc.get_closing_price_daily_list(tsetmc_code=code)
+    ),
+    StoredHistory(
+        table="client_type_daily",
+        model=ClientTypeDaily,
+        fields=CLIENT_TYPE_DAILY_FIELDS,
+        to_row=_client_type_row,
+        fetch=lambda tsetmc, code, last_date:
+        tsetmc.get_client_type_daily_list(tsetmc_code=code)
+    ),
+    StoredHistory(
+        table="index_daily",
+        model=IndexDaily,
+        fields=INDEX_DAILY_FIELDS,
+        to_row=lambda x: (
+            date_to_d_even(x.record_date),
+            x.min_value, x.max_value, x.close_value
+        ),
+        fetch=lambda tsetmc, code, last_date:
+        tsetmc.get_index_history(tsetmc_code=code)
+    ),
+    StoredHistory(
+        table="price_adjustment",
+        model=PriceAdjustment,
+        fields=PRICE_ADJUSTMENT_FIELDS,
+        to_row=lambda x: (date_to_d_even(x.date), x.price_before, x.price_after),
+        fetch=lambda tsetmc, code, last_date:
+        tsetmc.get_price_adjustment_list(tsetmc_code=code)
+    ),
+    StoredHistory(
+        table="instrument_share_change",
+        model=InstrumentShareChange,
+        fields=INSTRUMENT_SHARE_CHANGE_FIELDS,
+        to_row=lambda x: (
+            date_to_d_even(x.record_date),
+            x.total_shares_before, x.total_shares_after
+        ),
+        fetch=lambda tsetmc, code, last_date:
+        tsetmc.get_instrument_share_change(tsetmc_code=code)
+    )
+)}
+
+_SQL_TYPES = {"i4": "INTEGER", "i8": "INTEGER", "f8": "REAL"}
+
+
+class HistoryStore:
+    """
+    SQLite store of the daily histories, one table per history keyed by \
+    (code, d_even). Only the closing price history can be requested \
+    partially, the other histories are fetched whole by sync, but only \
+    their new days are written.
+    """
+
+    def __init__(self, path: str):
+        self.path: str = path
+        self.__connection = sqlite3.connect(path)
+        for history in STORED_HISTORIES.values():
+            columns = ", ".join(
+                f"{name} {_SQL_TYPES[dtype]}" for name, dtype, _ in history.fields
+            )
+            self.__connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {history.table} (code TEXT, \
+{columns}, PRIMARY KEY (code, d_even)) WITHOUT ROWID"
+            )
+        self.__connection.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self) -> None:
+        """Closes the database connection"""
+        self.__connection.close()
+
+    def put(self, kind: str, tsetmc_code: str, models: list) -> int:
+        """Writes the models of a history, replacing stored days"""
+        history = STORED_HISTORIES[kind]
+        placeholders = ", ".join("?" * (len(history.fields) + 1))
+        with self.__connection:
+            self.__connection.executemany(
+                f"INSERT OR REPLACE INTO {history.table} VALUES ({placeholders})",
+                ((tsetmc_code, *history.to_row(x)) for x in models)
+            )
+        return len(models)
+
+    def __select(
+            self,
+            kind: str,
+            tsetmc_code: str,
+            start: date = None,
+            end: date = None
+    ) -> list[dict]:
+        """Reads the stored rows of a range as raw TSETMC dicts, oldest first"""
+        history = STORED_HISTORIES[kind]
+        rows = self.__connection.execute(
+            f"SELECT * FROM {history.table} WHERE code = ? \
+AND d_even BETWEEN ? AND ? ORDER BY d_even",
+            (
+                tsetmc_code,
+                date_to_d_even(start) if start else 0,
+                date_to_d_even(end) if end else 99999999
+            )
+        )
+        keys = [raw_key for _, _, raw_key in history.fields]
+        return [dict(zip(keys, x[1:])) for x in rows]
+
+    def get(
+            self,
+            kind: str,
+            tsetmc_code: str,
+            start: date = None,
+            end: date = None
+    ) -> list:
+        """Get the stored models of a history between two dates, oldest first"""
+        model = STORED_HISTORIES[kind].model
+        return [
+            model(tsetmc_raw_data=x)
+            for x in self.__select(kind, tsetmc_code, start, end)
+        ]
+
+    def get_columnar(
+            self,
+            kind: str,
+            tsetmc_code: str,
+            start: date = None,
+            end: date = None
+    ):
+        """Get the stored rows of a history as a NumPy structured array"""
+        return to_structured_array(
+            self.__select(kind, tsetmc_code, start, end),
+            STORED_HISTORIES[kind].fields
+        )
+
+    def last_date(self, kind: str, tsetmc_code: str) -> date:
+        """Get the last stored day of a history, None if nothing is stored"""
+        d_even = self.__connection.execute(
+            f"SELECT MAX(d_even) FROM {STORED_HISTORIES[kind].table} \
+WHERE code = ?",
+            (tsetmc_code,)
+        ).fetchone()[0]
+        return d_even_to_date(d_even) if d_even else None
+
+    async def sync(
+            self,
+            tsetmc: TsetmcScraper,
+            tsetmc_code: str,
+            kinds: tuple[str] = None
+    ) -> dict[str, int]:
+        """
+        Fetches and stores the days after the last stored one. The last \
+        stored day is fetched again, as it may have been stored mid-session. \
+        Returns the number of rows written for each history.
+        """
+        written = {}
+        for kind in kinds if kinds else STORED_HISTORIES:
+            history = STORED_HISTORIES[kind]
+            last_date = self.last_date(kind, tsetmc_code)
+            models = await history.fetch(
+                tsetmc,
+                tsetmc_code,
+                last_date - timedelta(days=1) if last_date else None
+            )
+            if last_date:
+                models = [
+                    x for x in models
+                    if history.to_row(x)[0] >= date_to_d_even(last_date)
+                ]
+            written[kind] = self.put(kind, tsetmc_code, models)
+        return written
@@ -0,0 +1,89 @@
+"""
+This module parses large TSETMC responses incrementally, \
+so that rows can be processed while the body is still downloading.
+"""
+import re
+from tse_utils.tsetmc.json_backends import JsonDecoder, StdlibJsonDecoder
+
+_STRUCTURAL = re.compile(rb'["{}\[\]]')
+_STRING_SPECIAL = re.compile(rb'["\\]')
+
+
+class JsonArrayStreamParser:
+    """
+    Extracts the elements of a named array from a JSON document fed in chunks. \
+    Elements must be objects or arrays, which is the case for TSETMC lists. \
+    Only the bytes of the element being parsed are buffered.
+    """
+    # pylint: disable=too-many-instance-attributes, too-few-public-methods
+    # The scanner state has to survive between chunks
+
+    def __init__(self, key: str, decoder: JsonDecoder = None):
+        self.decoder: JsonDecoder = decoder if decoder else StdlibJsonDecoder()
+        self.done: bool = False
+        self._opening = re.compile(
+            b'"' + re.escape(key.encode("utf-8")) + rb'"\s*:\s*\['
+        )
+        self._in_array: bool = False
+        self._buffer: bytearray = bytearray()
+        self._pos: int = 0
+        self._start: int = 0
+        self._depth: int = 0
+        self._in_string: bool = False
+
+    def feed(self, chunk: bytes) -> list:
+        """Feeds the next chunk and returns the elements completed by it"""
+        # pylint: disable=too-many-branches
+        # A single flat loop keeps the scanner fast
+        if self.done:
+            return []
+        self._buffer += chunk
+        if not self._in_array:
+            match = self._opening.search(self._buffer)
+            if not match:
+                return []
+            del self._buffer[:match.end()]
+            self._in_array = True
+        elements = []
+        buffer = self._buffer
+        while True:
+            if self._in_string:
+                match = _STRING_SPECIAL.search(buffer, self._pos)
+                if not match:
+                    self._pos = len(buffer)
+                    break
+                if match.group() == b'\\':
+                    if match.end() >= len(buffer):
+                        self._pos = match.start()
+                        break
+                    self._pos = match.end() + 1
+                else:
+                    self._in_string = False
+                    self._pos = match.end()
+                continue
+            match = _STRUCTURAL.search(buffer, self._pos)
+            if not match:
+                self._pos = len(buffer)
+                break
+            char = match.group()
+            self._pos = match.end()
+            if char == b'"':
+                self._in_string = True
+            elif char in (b'{', b'['):
+                if self._depth == 0:
+                    self._start = match.start()
+                self._depth += 1
+            elif self._depth == 0:
+                self.done = True
+                break
+            else:
+                self._depth -= 1
+                if self._depth == 0:
+                    elements.append(self.decoder.decode(
+                        bytes(buffer[self._start:self._pos])
+                    ))
+        trim = self._pos if self._depth == 0 else self._start
+        del buffer[:trim]
+        self._pos -= trim
+        self._start = 0
+        return elements
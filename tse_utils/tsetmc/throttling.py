@@ -0,0 +1,115 @@
+"""
+This module holds the rate limiting utilities used for pacing \
+the requests sent to the TSETMC website.
+"""
+import asyncio
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Token bucket that refills at a constant rate up to its capacity.
+    Tokens are reserved in advance, so concurrent callers are served \
+    in the order of their arrival and never busy-wait.
+    """
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate: float = rate
+        self.capacity: float = capacity if capacity else max(1.0, rate)
+        self._tokens: float = self.capacity
+        self._updated: float = time.monotonic()
+        self._blocked_until: float = 0.0
+        self._lock: threading.Lock = threading.Lock()
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        """Reserves tokens and returns the seconds to wait before using them"""
+        with self._lock:
+            now = time.monotonic()
+            if now > self._updated:
+                self._tokens = min(
+                    self.capacity,
+                    self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+            self._tokens -= tokens
+            return max(
+                0.0,
+                self._updated - now - self._tokens / self.rate,
+                self._blocked_until - now
+            )
+
+    def pause(self, seconds: float) -> None:
+        """
+        Blocks new reservations for a while, e.g. after server push-back. \
+        No tokens build up during the pause, so the callers queued by then \
+        are spaced by the rate after it instead of going out at once.
+        """
+        with self._lock:
+            self._blocked_until = max(
+                self._blocked_until,
+                time.monotonic() + seconds
+            )
+            self._updated = max(self._updated, self._blocked_until)
+            self._tokens = min(self._tokens, 0.0)
+
+
+class RateLimiter:
+    """
+    Paces requests using a global budget and optional per-endpoint budgets. \
+    A single instance can be shared by several scrapers in one process.
+    """
+
+    def __init__(
+            self,
+            rate: float = 20.0,
+            burst: float = None,
+            endpoint_limits: dict[str, float | tuple[float, float]] = None,
+            pushback_pause: float = 1.0
+    ):
+        """
+        rate and burst define the global budget in requests per second. \
+        endpoint_limits maps endpoint names, e.g. "GetClosingPriceInfo", \
+        to either a rate or a (rate, burst) tuple.
+        """
+        self.pushback_pause: float = pushback_pause
+        self._global: TokenBucket = TokenBucket(rate=rate, capacity=burst)
+        self._endpoints: dict[str, TokenBucket] = {}
+        for endpoint, limit in (endpoint_limits or {}).items():
+            if isinstance(limit, tuple):
+                self.set_endpoint_limit(endpoint, *limit)
+            else:
+                self.set_endpoint_limit(endpoint, limit)
+
+    def set_endpoint_limit(
+            self,
+            endpoint: str,
+            rate: float,
+            burst: float = None
+    ) -> None:
+        """Sets or replaces the budget of a single endpoint"""
+        self._endpoints[endpoint] = TokenBucket(rate=rate, capacity=burst)
+
+    async def acquire(self, endpoint: str = None) -> None:
+        """Waits until both the global and the endpoint budgets allow a request"""
+        wait = self._global.reserve()
+        bucket = self._endpoints.get(endpoint)
+        if bucket:
+            wait = max(wait, bucket.reserve())
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def report_pushback(
+            self,
+            endpoint: str = None,
+            retry_after: float = None
+    ) -> None:
+        """
+        Pauses the budgets after the server pushed back (429 or 5xx). \
+        Retry-After is respected when the server sends it.
+        """
+        pause = retry_after if retry_after is not None else self.pushback_pause
+        self._global.pause(pause)
+        bucket = self._endpoints.get(endpoint)
+        if bucket:
+            bucket.pause(pause)
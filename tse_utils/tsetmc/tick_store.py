@@ -0,0 +1,172 @@
+"""
+This module stores intraday trades and best limits history as fixed-width \
+binary files, one per instrument and day, which are read back through \
+memory mapping as NumPy structured arrays without parsing or copying.
+Requires NumPy (pip install tse_utils[numpy]).
+"""
+from datetime import date
+from typing import Iterator
+import os
+from tse_utils.tsetmc.app import TsetmcScraper
+from tse_utils.tsetmc.caching import is_closed_day
+from tse_utils.tsetmc.columnar import (
+    require_numpy,
+    TRADE_INTRADAY_FIELDS,
+    BEST_LIMITS_HISTORY_FIELDS
+)
+
+TICK_KINDS: dict[str, tuple] = {
+    "trades": TRADE_INTRADAY_FIELDS,
+    "best_limits": BEST_LIMITS_HISTORY_FIELDS
+}
+
+
+class TickStore:
+    """
+    Append-only tick files laid out as root/kind/tsetmc_code/yyyymmdd.bin, \
+    next to an empty yyyymmdd.final marker once a day is complete. \
+    Records are packed little-endian rows of the kind's columnar fields, \
+    so a file is simply an array of its record type and a day is read \
+    by mapping the file. Kinds are "trades" and "best_limits".
+    """
+
+    def __init__(self, root: str):
+        self.root: str = root
+
+    @staticmethod
+    def dtype(kind: str):
+        """Get the on-disk record type of a kind"""
+        numpy = require_numpy()
+        return numpy.dtype([
+            (name, "<" + dtype) for name, dtype, _ in TICK_KINDS[kind]
+        ])
+
+    def path(self, kind: str, tsetmc_code: str, query_date: date) -> str:
+        """Get the file path of an instrument's ticks on a day"""
+        return os.path.join(
+            self.root, kind, tsetmc_code, f"{query_date:%Y%m%d}.bin"
+        )
+
+    def has(self, kind: str, tsetmc_code: str, query_date: date) -> bool:
+        """Checks whether the ticks of a day are stored"""
+        return os.path.exists(self.path(kind, tsetmc_code, query_date))
+
+    def is_final(self, kind: str, tsetmc_code: str, query_date: date) -> bool:
+        """
+        Checks whether the stored ticks of a day were fetched after it closed, \
+        so they are complete and never need to be fetched again.
+        """
+        return os.path.exists(self.__final_path(kind, tsetmc_code, query_date))
+
+    def __final_path(self, kind: str, tsetmc_code: str, query_date: date) -> str:
+        """Get the path of the marker of a day's final ticks"""
+        return self.path(kind, tsetmc_code, query_date)[:-len(".bin")] + ".final"
+
+    def write(
+            self,
+            kind: str,
+            tsetmc_code: str,
+            query_date: date,
+            ticks,
+            final: bool = False
+    ) -> None:
+        """
+        Stores the ticks of a day, atomically replacing stored ones. \
+        If final is set, the day is marked as complete, otherwise \
+        a previous mark is removed.
+        """
+        # pylint: disable=too-many-arguments
+        # The final flag travels with the ticks it describes
+        path = self.path(kind, tsetmc_code, query_date)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "wb") as file:
+            file.write(ticks.astype(self.dtype(kind), copy=False).tobytes())
+        final_path = self.__final_path(kind, tsetmc_code, query_date)
+        if not final and os.path.exists(final_path):
+            os.remove(final_path)
+        os.replace(temp_path, path)
+        if final:
+            with open(final_path, "wb"):
+                pass
+
+    def append(self, kind: str, tsetmc_code: str, query_date: date, ticks) -> None:
+        """Appends ticks to the end of a day's file"""
+        path = self.path(kind, tsetmc_code, query_date)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "ab") as file:
+            file.write(ticks.astype(self.dtype(kind), copy=False).tobytes())
+
+    def read(self, kind: str, tsetmc_code: str, query_date: date):
+        """
+        Maps the ticks of a day as a read-only structured array. \
+        Only the pages that are actually accessed are read from the disk.
+        """
+        numpy = require_numpy()
+        dtype = self.dtype(kind)
+        path = self.path(kind, tsetmc_code, query_date)
+        size = os.path.getsize(path)
+        if size < dtype.itemsize:
+            return numpy.empty(0, dtype=dtype)
+        return numpy.memmap(
+            path, dtype=dtype, mode="r", shape=(size // dtype.itemsize,)
+        )
+
+    def days(self, kind: str, tsetmc_code: str) -> list[date]:
+        """Get the stored days of an instrument, oldest first"""
+        directory = os.path.join(self.root, kind, tsetmc_code)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(
+            date(int(x[:4]), int(x[4:6]), int(x[6:8]))
+            for x in os.listdir(directory) if x.endswith(".bin")
+        )
+
+    def scan(
+            self,
+            kind: str,
+            tsetmc_code: str,
+            start: date = None,
+            end: date = None
+    ) -> Iterator[tuple[date, object]]:
+        """Iterates over the mapped ticks of the stored days in a range"""
+        for day in self.days(kind, tsetmc_code):
+            if (start is None or day >= start) and (end is None or day <= end):
+                yield day, self.read(kind, tsetmc_code, day)
+
+    async def sync(
+            self,
+            tsetmc: TsetmcScraper,
+            tsetmc_code: str,
+            query_date: date,
+            *,
+            kinds: tuple[str] = None,
+            timeout: int = 3
+    ) -> dict[str, int]:
+        """
+        Fetches and stores the ticks of a day in columnar mode, so that no \
+        model objects are built. Ticks fetched after the day closed are \
+        marked final and never fetched again, while those of an open session \
+        are refetched by the next sync. Empty responses are not stored. \
+        Returns the number of records written for each kind.
+        """
+        # pylint: disable=too-many-arguments
+        # Mirrors the arguments of the history endpoints
+        written = {}
+        for kind in kinds if kinds else TICK_KINDS:
+            if self.is_final(kind, tsetmc_code, query_date):
+                continue
+            closed = is_closed_day(query_date)
+            fetch = tsetmc.get_trade_intraday_hisory_list if kind == "trades" \
+                else tsetmc.get_best_limits_intraday_history_list
+            ticks = await fetch(
+                tsetmc_code=tsetmc_code,
+                query_date=query_date,
+                timeout=timeout,
+                columnar=True
+            )
+            if len(ticks) == 0:
+                continue
+            self.write(kind, tsetmc_code, query_date, ticks, final=closed)
+            written[kind] = len(ticks)
+        return written